@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""An asyncio github org client
+"""
+import time
+import asyncio
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from client import GithubOrgClient, _page_urls
+
+__all__ = [
+    "AsyncGithubOrgClient",
+    "AsyncHTTPClient",
+    "RateLimiter",
+    "async_get_json",
+    "fetch_public_repos",
+]
+
+
+class RateLimiter:
+    """Token bucket allowing `rate` requests per second, in bursts of `burst`
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """Init method of RateLimiter"""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                refill = (now - self._updated) * self.rate
+                self._tokens = min(self.burst, self._tokens + refill)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncHTTPClient:
+    """Shared aiohttp session with a concurrency limit and per-host
+    rate limiting.
+    Every request goes through one connection pool, so connections to the
+    same host are kept alive and reused; at most `concurrency` requests are
+    in flight at once and each host gets its own RateLimiter.
+    Use it as an async context manager:
+    >>> async with AsyncHTTPClient(concurrency=10, rate=5) as http:
+    ...     org = await http.get_json("https://api.github.com/orgs/google")
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        timeout: float = 30,
+    ) -> None:
+        """Init method of AsyncHTTPClient
+        rate is in requests per second per host (None for no limit)
+        """
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.stats = {"requests": 0}
+
+    async def open(self) -> "AsyncHTTPClient":
+        """Open the underlying session"""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                raise_for_status=True,
+            )
+        return self
+
+    async def close(self) -> None:
+        """Close the underlying session"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncHTTPClient":
+        return await self.open()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def _limiter(self, url: str) -> Optional[RateLimiter]:
+        """Rate limiter of the URL's host"""
+        if self.rate is None:
+            return None
+        host = urlsplit(url).netloc
+        if host not in self._limiters:
+            self._limiters[host] = RateLimiter(self.rate, self.burst)
+        return self._limiters[host]
+
+    async def get_json_page(self, url: str) -> Tuple[Any, Dict[str, str]]:
+        """Get JSON from remote URL along with its {rel: url} Link header"""
+        await self.open()
+        # Wait for the host's rate limit before taking a concurrency slot,
+        # so a throttled host does not hold slots other hosts could use
+        limiter = self._limiter(url)
+        if limiter is not None:
+            await limiter.acquire()
+        async with self._semaphore:
+            self.stats["requests"] += 1
+            async with self._session.get(url) as response:
+                payload = await response.json()
+                links = {
+                    rel: str(link["url"])
+                    for rel, link in response.links.items()
+                }
+        return payload, links
+
+    async def get_json(self, url: str) -> Any:
+        """Get JSON from remote URL"""
+        return (await self.get_json_page(url))[0]
+
+
+async def async_get_json(
+    url: str, http: Optional[AsyncHTTPClient] = None
+) -> Any:
+    """Get JSON from remote URL, on `http` or on a one-off session"""
+    if http is not None:
+        return await http.get_json(url)
+    async with AsyncHTTPClient() as http:
+        return await http.get_json(url)
+
+
+class AsyncGithubOrgClient:
+    """An asyncio Github org client
+    Results are memoized like GithubOrgClient's: concurrent callers share
+    the same in-flight request, and a failed or cancelled request is not
+    memoized so the next call retries it.
+    """
+    ORG_URL = GithubOrgClient.ORG_URL
+    has_license = staticmethod(GithubOrgClient.has_license)
+
+    def __init__(self, org_name: str, http: AsyncHTTPClient) -> None:
+        """Init method of AsyncGithubOrgClient"""
+        self._org_name = org_name
+        self._http = http
+        self._tasks: Dict[str, asyncio.Future] = {}
+
+    def _memoize(self, name: str, coroutine_fn) -> asyncio.Future:
+        """Share one task per memoized attribute.
+        Callers get a shielded view of the task, so cancelling one of them
+        does not cancel it for the others.
+        """
+        if name not in self._tasks:
+            task = asyncio.ensure_future(coroutine_fn())
+            task.add_done_callback(lambda done: self._forget(name, done))
+            self._tasks[name] = task
+        return asyncio.shield(self._tasks[name])
+
+    def _forget(self, name: str, task: asyncio.Future) -> None:
+        """Drop a failed or cancelled task so it can be retried"""
+        if task.cancelled() or task.exception() is not None:
+            if self._tasks.get(name) is task:
+                del self._tasks[name]
+
+    async def org(self) -> Dict:
+        """Memoize org"""
+        url = self.ORG_URL.format(org=self._org_name)
+        return await self._memoize("org", lambda: self._http.get_json(url))
+
+    async def _public_repos_url(self) -> str:
+        """Public repos URL"""
+        return (await self.org())["repos_url"]
+
+    async def _fetch_repos(self) -> List[Dict]:
+        """Fetch every page of the org's repos.
+        Once the first page gives the rel=last link, the remaining pages are
+        requested concurrently; otherwise rel=next is followed.
+        """
+        repos, links = await self._http.get_json_page(
+            await self._public_repos_url()
+        )
+        repos = list(repos)
+        page_urls = _page_urls(links["last"]) if "last" in links else None
+        if page_urls is None:
+            while "next" in links:
+                page, links = await self._http.get_json_page(links["next"])
+                repos.extend(page)
+            return repos
+        pages = await asyncio.gather(
+            *(self._http.get_json(url) for url in page_urls)
+        )
+        for page in pages:
+            repos.extend(page)
+        return repos
+
+    async def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload (every page)"""
+        return await self._memoize("repos_payload", self._fetch_repos)
+
+    async def public_repos(self, license: str = None) -> List[str]:
+        """Public repos"""
+        return [
+            repo["name"] for repo in await self.repos_payload()
+            if license is None or self.has_license(repo, license)
+        ]
+
+
+async def fetch_public_repos(
+    org_names: Sequence[str],
+    license: str = None,
+    http: Optional[AsyncHTTPClient] = None,
+) -> Dict[str, Union[List[str], Exception]]:
+    """Fetch the public repos of many orgs concurrently.
+    Returns {org: repo names}, or the exception raised for that org.
+    """
+    if http is None:
+        async with AsyncHTTPClient() as http:
+            return await fetch_public_repos(org_names, license, http)
+    results = await asyncio.gather(
+        *(AsyncGithubOrgClient(name, http).public_repos(license)
+          for name in org_names),
+        return_exceptions=True,
+    )
+    return dict(zip(org_names, results))
@@ -1,31 +1,67 @@
 #!/usr/bin/env python3
 """A github org client
 """
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import (
+    Any,
     List,
     Dict,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Sequence,
 )
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
 
 from utils import (
+    RateLimitTracker,
     get_json,
+    get_json_page,
     access_nested_map,
     memoize,
 )
 
 
+def _page_urls(last_url: str) -> Optional[List[str]]:
+    """URLs of pages 2..N given the rel=last link of a listing"""
+    parts = urlsplit(last_url)
+    query = parse_qs(parts.query)
+    try:
+        last_page = int(query["page"][0])
+    except (KeyError, ValueError):
+        return None
+    urls = []
+    for page in range(2, last_page + 1):
+        query["page"] = [str(page)]
+        page_query = urlencode(query, doseq=True)
+        urls.append(urlunsplit(parts._replace(query=page_query)))
+    return urls
+
+
 class GithubOrgClient:
     """A Githib org client
     """
     ORG_URL = "https://api.github.com/orgs/{org}"
 
-    def __init__(self, org_name: str) -> None:
-        """Init method of GithubOrgClient"""
+    def __init__(
+        self, org_name: str, rate_limit: Optional[RateLimitTracker] = None
+    ) -> None:
+        """Init method of GithubOrgClient
+        rate_limit throttles this client's requests (see RateLimitTracker)
+        """
         self._org_name = org_name
+        self._request_options = {} if rate_limit is None else {
+            "rate_limit": rate_limit
+        }
 
     @memoize
     def org(self) -> Dict:
         """Memoize org"""
-        return get_json(self.ORG_URL.format(org=self._org_name))
+        return get_json(
+            self.ORG_URL.format(org=self._org_name), **self._request_options
+        )
 
     @property
     def _public_repos_url(self) -> str:
@@ -33,9 +69,51 @@ class GithubOrgClient:
         return self.org["repos_url"]
 
     @memoize
-    def repos_payload(self) -> Dict:
-        """Memoize repos payload"""
-        return get_json(self._public_repos_url)
+    def repos_payload(self) -> List[Dict]:
+        """Memoize repos payload (every page)"""
+        return list(self.iter_repos())
+
+    def iter_repos(self, max_workers: int = 4) -> Iterator[Dict]:
+        """Yield the org's repos page by page.
+        Pages are followed through the Link header; once the first page
+        gives the rel=last link, the remaining pages are fetched by up to
+        `max_workers` threads, at most `max_workers` pages ahead of the
+        consumer, and still yielded in order.
+        """
+        options = self._request_options
+        repos, links = get_json_page(self._public_repos_url, **options)
+        yield from repos
+        page_urls = _page_urls(links["last"]) if "last" in links else None
+        if page_urls is None:
+            while "next" in links:
+                repos, links = get_json_page(links["next"], **options)
+                yield from repos
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        pending: deque = deque()
+        urls = iter(page_urls)
+        try:
+            for url in urls:
+                pending.append(executor.submit(get_json_page, url, **options))
+                if len(pending) >= max_workers:
+                    break
+            while pending:
+                repos, _ = pending.popleft().result()
+                for url in urls:
+                    pending.append(
+                        executor.submit(get_json_page, url, **options)
+                    )
+                    break
+                yield from repos
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_public_repos(self, license: str = None) -> Iterator[str]:
+        """Yield public repo names as their pages arrive"""
+        for repo in self.iter_repos():
+            if license is None or self.has_license(repo, license):
+                yield repo["name"]
 
     def public_repos(self, license: str = None) -> List[str]:
         """Public repos"""
@@ -55,4 +133,69 @@ class GithubOrgClient:
             has_license = access_nested_map(repo, ("license", "key")) == license_key
         except KeyError:
             return False
-        return has_license
\ No newline at end of file
+        return has_license
+
+
+class OrgResult(NamedTuple):
+    """Outcome of fetching one org"""
+    org: str
+    repos: Optional[List[str]]
+    error: Optional[Exception]
+    elapsed: float
+
+
+class BulkResult(NamedTuple):
+    """Per-org results and timing stats of fetch_orgs"""
+    results: Dict[str, OrgResult]
+    stats: Dict[str, Any]
+
+
+def _fetch_org(
+    org_name: str, license: Optional[str], rate_limit: RateLimitTracker
+) -> OrgResult:
+    """Fetch one org and its public repos"""
+    started = time.perf_counter()
+    try:
+        client = GithubOrgClient(org_name, rate_limit=rate_limit)
+        repos = client.public_repos(license)
+    except Exception as e:
+        return OrgResult(org_name, None, e, time.perf_counter() - started)
+    return OrgResult(org_name, repos, None, time.perf_counter() - started)
+
+
+def fetch_orgs(
+    org_names: Sequence[str],
+    license: str = None,
+    max_workers: int = 8,
+    rate_limit: Optional[RateLimitTracker] = None,
+) -> BulkResult:
+    """Fetch the public repos of many orgs over a thread pool.
+    Every request is throttled by `rate_limit` (a fresh RateLimitTracker
+    by default), shared by all workers: requests slow down as
+    X-RateLimit-Remaining runs low, and Retry-After or an exhausted limit
+    pauses every worker.
+    A failing org is reported in its OrgResult instead of raising.
+    """
+    tracker = rate_limit or RateLimitTracker()
+    started = time.perf_counter()
+    results: Dict[str, OrgResult] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_org, name, license, tracker)
+            for name in org_names
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result.org] = result
+    timings = [result.elapsed for result in results.values()]
+    stats = {
+        "orgs": len(results),
+        "failed": sum(result.error is not None for result in results.values()),
+        "elapsed": time.perf_counter() - started,
+        "mean": sum(timings) / len(timings) if timings else 0.0,
+        "max": max(timings, default=0.0),
+        "throttled": tracker.stats["throttled"],
+        "throttle_wait": tracker.stats["waited"],
+        "retries": tracker.stats["retries"],
+    }
+    return BulkResult(results, stats)
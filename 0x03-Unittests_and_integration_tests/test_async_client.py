@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""Unit tests for the asyncio client in async_client.py"""
+import time
+import asyncio
+import unittest
+from unittest.mock import patch
+from aiohttp import ClientResponseError, web
+from aiohttp.test_utils import TestServer
+from async_client import (
+    AsyncGithubOrgClient,
+    AsyncHTTPClient,
+    RateLimiter,
+    fetch_public_repos,
+)
+from fixtures import TEST_PAYLOAD
+
+
+class StubGithub:
+    """aiohttp app serving org and paginated repos payloads."""
+
+    def __init__(self, orgs: dict, page_size: int = 2) -> None:
+        """Serve `orgs` ({name: (org payload, repos)}) in pages"""
+        self.orgs = orgs
+        self.page_size = page_size
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+        self.app = web.Application()
+        self.app.router.add_get("/orgs/{org}", self.org)
+        self.app.router.add_get("/orgs/{org}/repos", self.repos)
+
+    async def _track(self) -> None:
+        """Record concurrent requests"""
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+
+    async def org(self, request: web.Request) -> web.Response:
+        """Serve an org payload pointing at the stub repos URL"""
+        await self._track()
+        name = request.match_info["org"]
+        if name not in self.orgs:
+            raise web.HTTPNotFound()
+        payload = dict(self.orgs[name][0])
+        payload["repos_url"] = str(request.url.with_path(
+            "/orgs/{}/repos".format(name)).with_query(None))
+        return web.json_response(payload)
+
+    async def repos(self, request: web.Request) -> web.Response:
+        """Serve one page of repos with GitHub style Link headers"""
+        await self._track()
+        repos = self.orgs[request.match_info["org"]][1]
+        page = int(request.query.get("page", 1))
+        last = max(1, -(-len(repos) // self.page_size))
+        start = (page - 1) * self.page_size
+        headers = {}
+        if page < last:
+            base = request.url.with_query(None)
+            headers["Link"] = '<{}>; rel="next", <{}>; rel="last"'.format(
+                base.with_query(page=page + 1), base.with_query(page=last))
+        return web.json_response(
+            repos[start:start + self.page_size], headers=headers)
+
+
+class StubServerTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class running a StubGithub server for each test."""
+
+    async def asyncSetUp(self) -> None:
+        """Start the stub server and point the client at it"""
+        org_payload, repos_payload = TEST_PAYLOAD[0][0], TEST_PAYLOAD[0][1]
+        self.github = StubGithub({
+            "google": (org_payload, repos_payload),
+            "abc": ({"login": "abc"}, [{"name": "only"}]),
+        })
+        self.server = TestServer(self.github.app)
+        await self.server.start_server()
+        patcher = patch.object(
+            AsyncGithubOrgClient, "ORG_URL",
+            str(self.server.make_url("/orgs/{org}")).replace(
+                "%7Borg%7D", "{org}"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        """Stop the stub server"""
+        await self.server.close()
+
+
+class TestAsyncGithubOrgClient(StubServerTestCase):
+    """Unit tests for AsyncGithubOrgClient"""
+
+    async def test_public_repos(self) -> None:
+        """Test that every page is fetched and names are in order"""
+        async with AsyncHTTPClient() as http:
+            client = AsyncGithubOrgClient("google", http)
+            self.assertEqual(await client.public_repos(), TEST_PAYLOAD[0][2])
+            self.assertEqual(
+                await client.public_repos(license="apache-2.0"),
+                TEST_PAYLOAD[0][3],
+            )
+
+    async def test_org_is_memoized(self) -> None:
+        """Test that concurrent callers share one org request"""
+        async with AsyncHTTPClient() as http:
+            client = AsyncGithubOrgClient("abc", http)
+            first, second = await asyncio.gather(client.org(), client.org())
+            self.assertEqual(first, second)
+            self.assertEqual(http.stats["requests"], 1)
+
+    async def test_cancelled_caller(self) -> None:
+        """Test that cancelling one caller does not cancel the others"""
+        self.github.delay = 0.05
+        async with AsyncHTTPClient() as http:
+            client = AsyncGithubOrgClient("abc", http)
+            cancelled = asyncio.ensure_future(client.org())
+            kept = asyncio.ensure_future(client.org())
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            self.assertEqual(await kept, {
+                "login": "abc",
+                "repos_url": str(self.server.make_url("/orgs/abc/repos")),
+            })
+            self.assertEqual(http.stats["requests"], 1)
+
+    async def test_failure_is_not_memoized(self) -> None:
+        """Test that a failed request is retried on the next call"""
+        async with AsyncHTTPClient() as http:
+            client = AsyncGithubOrgClient("later", http)
+            with self.assertRaises(ClientResponseError):
+                await client.org()
+            self.github.orgs["later"] = ({"login": "later"}, [])
+            self.assertEqual((await client.org())["login"], "later")
+
+    async def test_fetch_public_repos(self) -> None:
+        """Test bulk fetching, with per-org errors"""
+        results = await fetch_public_repos(["google", "abc", "missing"])
+        self.assertEqual(results["google"], TEST_PAYLOAD[0][2])
+        self.assertEqual(results["abc"], ["only"])
+        self.assertIsInstance(results["missing"], Exception)
+
+
+class TestAsyncHTTPClient(StubServerTestCase):
+    """Unit tests for the limits of AsyncHTTPClient"""
+
+    async def test_concurrency_limit(self) -> None:
+        """Test that no more than `concurrency` requests are in flight"""
+        self.github.delay = 0.02
+        url = str(self.server.make_url("/orgs/abc"))
+        async with AsyncHTTPClient(concurrency=2) as http:
+            await asyncio.gather(*(http.get_json(url) for _ in range(6)))
+        self.assertEqual(self.github.max_in_flight, 2)
+
+    async def test_rate_limit(self) -> None:
+        """Test that requests to a host are spaced by the rate limit"""
+        url = str(self.server.make_url("/orgs/abc"))
+        started = time.monotonic()
+        async with AsyncHTTPClient(rate=50, burst=1) as http:
+            await asyncio.gather(*(http.get_json(url) for _ in range(5)))
+        self.assertGreaterEqual(time.monotonic() - started, 4 / 50)
+
+    async def test_throttled_host_keeps_no_slot(self) -> None:
+        """Test that requests waiting on a host's rate limit do not hold
+        concurrency slots needed by other hosts"""
+        slow = str(self.server.make_url("/orgs/abc"))
+        fast = slow.replace("127.0.0.1", "localhost")
+        async with AsyncHTTPClient(concurrency=1, rate=5, burst=1) as http:
+            throttled = asyncio.gather(
+                *(http.get_json(slow) for _ in range(3)))
+            await asyncio.sleep(0.05)
+            started = time.monotonic()
+            await http.get_json(fast)
+            self.assertLess(time.monotonic() - started, 0.15)
+            await throttled
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    """Unit tests for RateLimiter"""
+
+    async def test_burst_then_wait(self) -> None:
+        """Test that a burst passes at once and the next call waits"""
+        limiter = RateLimiter(rate=20, burst=3)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire()
+        self.assertLess(time.monotonic() - started, 0.04)
+        await limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,9 @@ from unittest.mock import patch, Mock, MagicMock, PropertyMock
 from parameterized import parameterized, parameterized_class
 from typing import Dict
 from requests import HTTPError
-from client import GithubOrgClient
+import utils
+from client import GithubOrgClient, fetch_orgs
+from utils import RateLimitTracker
 from fixtures import TEST_PAYLOAD
 
 
@@ -40,7 +42,7 @@ class TestGithubOrgClient(unittest.TestCase):
                 "https://api.github.com/users/google/repos",
             )
 
-    @patch("client.get_json")
+    @patch("client.get_json_page")
     def test_public_repos(self, mock_get_json: MagicMock) -> None:
         """Test output for GithubOrgClient method public_repos"""
         test_payload = {
@@ -54,7 +56,7 @@ class TestGithubOrgClient(unittest.TestCase):
                 },
             ],
         }
-        mock_get_json.return_value = test_payload["repos"]
+        mock_get_json.return_value = (test_payload["repos"], {})
         with patch(
             "client.GithubOrgClient._public_repos_url",
             new_callable=PropertyMock
@@ -70,6 +72,69 @@ class TestGithubOrgClient(unittest.TestCase):
             mock_public_repos_url.assert_called_once()
         mock_get_json.assert_called_once()
 
+    @patch("client.get_json_page")
+    def test_iter_repos_follows_next(self, mock_get_json_page: Mock) -> None:
+        """Test that pages without a rel=last link are followed by rel=next"""
+        base = "https://api.github.com/orgs/google/repos"
+        pages = {
+            base: ([{"name": "a"}], {"next": base + "?after=a"}),
+            base + "?after=a": ([{"name": "b"}], {"next": base + "?after=b"}),
+            base + "?after=b": ([{"name": "c"}], {}),
+        }
+        mock_get_json_page.side_effect = pages.__getitem__
+        with patch("client.GithubOrgClient._public_repos_url",
+                   new_callable=PropertyMock, return_value=base):
+            repos = GithubOrgClient("google").iter_repos()
+            self.assertEqual(
+                [repo["name"] for repo in repos], ["a", "b", "c"]
+            )
+        self.assertEqual(mock_get_json_page.call_count, 3)
+
+    @patch("client.get_json_page")
+    def test_iter_repos_fetches_known_pages(
+        self, mock_get_json_page: Mock
+    ) -> None:
+        """Test that pages up to rel=last are all fetched, in order"""
+        base = "https://api.github.com/orgs/google/repos"
+
+        def page(url: str):
+            """Serve page N of a five page listing"""
+            number = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+            links = {}
+            if number == 1:
+                links = {"next": base + "?per_page=1&page=2",
+                         "last": base + "?per_page=1&page=5"}
+            return [{"name": "repo{}".format(number)}], links
+
+        mock_get_json_page.side_effect = page
+        with patch("client.GithubOrgClient._public_repos_url",
+                   new_callable=PropertyMock, return_value=base):
+            client = GithubOrgClient("google")
+            self.assertEqual(
+                [repo["name"] for repo in client.iter_repos(max_workers=2)],
+                ["repo1", "repo2", "repo3", "repo4", "repo5"],
+            )
+        requested = sorted(call.args[0] for call in
+                           mock_get_json_page.call_args_list)
+        self.assertEqual(requested, sorted(
+            [base] + ["{}?per_page=1&page={}".format(base, n)
+                      for n in range(2, 6)]
+        ))
+
+    @patch("client.get_json_page")
+    def test_iter_public_repos(self, mock_get_json_page: Mock) -> None:
+        """Test that iter_public_repos streams names filtered by license"""
+        mock_get_json_page.return_value = ([
+            {"name": "a", "license": {"key": "mit"}},
+            {"name": "b", "license": {"key": "apache-2.0"}},
+            {"name": "c"},
+        ], {})
+        with patch("client.GithubOrgClient._public_repos_url",
+                   new_callable=PropertyMock, return_value="url"):
+            names = GithubOrgClient("google").iter_public_repos("mit")
+            self.assertEqual(next(names), "a")
+            self.assertEqual(list(names), [])
+
     @parameterized.expand(
         [
             ({"license": {"key": "my_license"}}, "my_license", True),
@@ -83,6 +148,43 @@ class TestGithubOrgClient(unittest.TestCase):
             )
 
 
+class TestFetchOrgs(unittest.TestCase):
+    """Unit tests for the bulk fetch_orgs"""
+
+    @patch("client.get_json_page")
+    @patch("client.get_json")
+    def test_fetch_orgs(self, mock_get_json: Mock,
+                        mock_get_json_page: Mock) -> None:
+        """Test per-org results and stats, including a failing org"""
+        def org(url: str, rate_limit: RateLimitTracker) -> Dict:
+            """Org payload, or an error for the missing org"""
+            name = url.rsplit("/", 1)[1]
+            if name == "missing":
+                raise HTTPError("404 Not Found")
+            return {"repos_url": url + "/repos"}
+
+        mock_get_json.side_effect = org
+        mock_get_json_page.side_effect = lambda url, rate_limit: ([
+            {"name": url.split("/")[-2] + "-repo",
+             "license": {"key": "mit"}},
+        ], {})
+
+        tracker = RateLimitTracker()
+        bulk = fetch_orgs(["google", "abc", "missing"], max_workers=2,
+                          rate_limit=tracker)
+
+        self.assertEqual(bulk.results["google"].repos, ["google-repo"])
+        self.assertEqual(bulk.results["abc"].repos, ["abc-repo"])
+        self.assertIsNone(bulk.results["abc"].error)
+        self.assertIsInstance(bulk.results["missing"].error, HTTPError)
+        self.assertEqual(bulk.stats["orgs"], 3)
+        self.assertEqual(bulk.stats["failed"], 1)
+        self.assertGreaterEqual(bulk.stats["elapsed"], bulk.stats["max"])
+        for call in mock_get_json.call_args_list:
+            self.assertIs(call.kwargs["rate_limit"], tracker)
+        self.assertIsNone(utils._rate_limit)
+
+
 @parameterized_class(
     [
         {
@@ -104,13 +206,16 @@ class TestIntegrationGithubOrgClient(unittest.TestCase):
             "https://api.github.com/orgs/google/repos": cls.repos_payload,
         }
 
-        def get_payload(url):
+        def get_payload(url, **kwargs):
             """method to get url payload"""
             if url in route_payload:
-                return Mock(**{"json.return_value": route_payload[url]})
+                return Mock(**{
+                    "json.return_value": route_payload[url],
+                    "links": {},
+                })
             return HTTPError
 
-        cls.get_patcher = patch("requests.get", side_effect=get_payload)
+        cls.get_patcher = patch("requests.Session.get", side_effect=get_payload)
         cls.get_patcher.start()
 
     @classmethod
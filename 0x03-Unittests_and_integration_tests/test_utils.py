@@ -2,10 +2,86 @@
 """
 Unit tests for functions in utils.py
 """
+import gzip
+import json
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from parameterized import parameterized
 from unittest.mock import patch, Mock
-from utils import access_nested_map, get_json, memoize
+from requests import HTTPError
+import utils
+from utils import (
+    RateLimitTracker,
+    access_nested_map,
+    configure_http_cache,
+    configure_rate_limit,
+    configure_session,
+    connection_stats,
+    get_json,
+    get_json_page,
+    memoize,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Keep-alive HTTP handler serving gzip-encoded JSON payloads."""
+    protocol_version = "HTTP/1.1"
+    payloads = {}
+    etags = {}
+    links = {}
+    not_modified = 0
+
+    def do_GET(self) -> None:
+        """Serve the payload registered for the request path."""
+        etag = self.etags.get(self.path)
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            StubHandler.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(self.payloads.get(self.path, {})).encode()
+        gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if self.path in self.links:
+            self.send_header("Link", self.links[self.path])
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        """Keep test output quiet."""
+
+
+class StubServerTestCase(unittest.TestCase):
+    """Base class running a local HTTP stub server for the test class."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Start the stub server on a free port."""
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = "http://127.0.0.1:{}".format(cls.server.server_port)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """Stop the stub server."""
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self) -> None:
+        """Start every test with a fresh shared session."""
+        configure_session()
 
 
 class TestAccessNestedMap(unittest.TestCase):
@@ -44,21 +120,230 @@ class TestGetJson(unittest.TestCase):
         ("http://google.com", {"payload": True}),
         ("http://holberton.io", {"payload": False}),
     ])
-    @patch("utils.requests.get")
+    @patch("utils.get_session")
     def test_get_json(
-        self, test_url: str, test_payload: dict, mock_get: Mock
+        self, test_url: str, test_payload: dict, mock_get_session: Mock
     ) -> None:
         """Test that get_json returns the expected JSON payload."""
         mock_response = Mock()
         mock_response.json.return_value = test_payload
-        mock_get.return_value = mock_response
+        mock_get_session.return_value.get.return_value = mock_response
 
         result = get_json(test_url)
 
-        mock_get.assert_called_once_with(test_url)
+        mock_get_session.return_value.get.assert_called_once_with(
+            test_url, timeout=utils.DEFAULT_TIMEOUT
+        )
         self.assertEqual(result, test_payload)
 
 
+class TestSession(StubServerTestCase):
+    """Test cases for the shared, pooled HTTP session."""
+
+    def test_connections_are_reused(self) -> None:
+        """Test that consecutive requests share one keep-alive connection."""
+        StubHandler.payloads = {"/orgs/google": {"login": "google"}}
+        url = self.base_url + "/orgs/google"
+
+        for _ in range(3):
+            self.assertEqual(get_json(url), {"login": "google"})
+
+        self.assertEqual(
+            connection_stats(),
+            {"requests": 3, "new_connections": 1, "reused_connections": 2},
+        )
+
+    def test_timeout_is_configurable(self) -> None:
+        """Test that configure_session sets the timeout used by get_json."""
+        StubHandler.payloads = {"/ping": {"pong": True}}
+        session = configure_session(timeout=1.5)
+
+        with patch.object(session, "get", wraps=session.get) as mock_get:
+            get_json(self.base_url + "/ping")
+
+        mock_get.assert_called_once_with(self.base_url + "/ping", timeout=1.5)
+
+
+class TestGetJsonPage(StubServerTestCase):
+    """Test cases for the get_json_page function."""
+
+    def test_links_are_parsed(self) -> None:
+        """Test that the Link header is returned as a {rel: url} dict."""
+        next_url = self.base_url + "/orgs/abc/repos?page=2"
+        last_url = self.base_url + "/orgs/abc/repos?page=4"
+        StubHandler.payloads = {"/orgs/abc/repos": [{"name": "a"}]}
+        StubHandler.links = {"/orgs/abc/repos": '<{}>; rel="next", '
+                             '<{}>; rel="last"'.format(next_url, last_url)}
+
+        payload, links = get_json_page(self.base_url + "/orgs/abc/repos")
+
+        self.assertEqual(payload, [{"name": "a"}])
+        self.assertEqual(links, {"next": next_url, "last": last_url})
+
+    def test_no_link_header(self) -> None:
+        """Test that a single page listing has no links."""
+        StubHandler.payloads = {"/orgs/abc/repos": []}
+        StubHandler.links = {}
+
+        self.assertEqual(
+            get_json_page(self.base_url + "/orgs/abc/repos"), ([], {})
+        )
+
+
+class TestHTTPCache(StubServerTestCase):
+    """Test cases for the conditional request cache of get_json."""
+
+    def setUp(self) -> None:
+        """Enable the cache in a temporary directory."""
+        super().setUp()
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.cache = configure_http_cache(self.cache_dir.name)
+        StubHandler.not_modified = 0
+
+    def tearDown(self) -> None:
+        """Disable the cache and remove its directory."""
+        configure_http_cache(None)
+        self.cache_dir.cleanup()
+
+    def test_not_modified_served_from_cache(self) -> None:
+        """Test that a 304 answer returns the cached payload."""
+        StubHandler.payloads = {"/orgs/abc": {"login": "abc"}}
+        StubHandler.etags = {"/orgs/abc": '"v1"'}
+        url = self.base_url + "/orgs/abc"
+
+        self.assertEqual(get_json(url), {"login": "abc"})
+        StubHandler.payloads = {}
+        self.assertEqual(get_json(url), {"login": "abc"})
+
+        self.assertEqual(StubHandler.not_modified, 1)
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_changed_resource_is_refreshed(self) -> None:
+        """Test that a new ETag replaces the cached payload."""
+        url = self.base_url + "/orgs/abc"
+        StubHandler.payloads = {"/orgs/abc": {"version": 1}}
+        StubHandler.etags = {"/orgs/abc": '"v1"'}
+        get_json(url)
+
+        StubHandler.payloads = {"/orgs/abc": {"version": 2}}
+        StubHandler.etags = {"/orgs/abc": '"v2"'}
+
+        self.assertEqual(get_json(url), {"version": 2})
+        self.assertEqual(self.cache.get(url)["etag"], '"v2"')
+
+    def test_concurrent_stores(self) -> None:
+        """Test that threads storing and evicting at once do not fail."""
+        self.cache.max_bytes = 2000
+        errors = []
+
+        def store(thread: int) -> None:
+            """Store entries until they evict each other."""
+            try:
+                for index in range(50):
+                    self.cache.set("{}-{}".format(thread, index), None, None,
+                                   {"pad": "x" * 100})
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=store, args=(thread,))
+                   for thread in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.cache.stats["stores"], 400)
+
+    def test_eviction_keeps_cache_bounded(self) -> None:
+        """Test that the least recently used entry is evicted first."""
+        self.cache.max_bytes = 300
+        for name in ("a", "b", "c"):
+            self.cache.set(name, '"{}"'.format(name), None, {"pad": "x" * 60})
+
+        self.assertIsNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+        self.assertGreaterEqual(self.cache.stats["evictions"], 1)
+
+
+def rate_limited_response(status: int = 200, **headers: str) -> Mock:
+    """Mock response carrying rate limit headers"""
+    return Mock(status_code=status, headers=headers,
+                **{"json.return_value": {"status": status}})
+
+
+class TestRateLimitTracker(unittest.TestCase):
+    """Test cases for the adaptive rate limit throttle."""
+
+    def setUp(self) -> None:
+        """Use a fake clock so no test actually sleeps."""
+        self.now = 1000.0
+        self.sleeps = []
+        self.tracker = RateLimitTracker(
+            reserve=10, clock=lambda: self.now, sleep=self.sleeps.append
+        )
+
+    def test_no_delay_with_plenty_left(self) -> None:
+        """Test that requests are not delayed far from the limit."""
+        self.tracker.observe(rate_limited_response(**{
+            "X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "1060"}))
+        self.assertEqual(self.tracker.delay(), 0)
+
+    def test_requests_are_spread_near_the_limit(self) -> None:
+        """Test that the last requests are spread until the reset."""
+        self.tracker.observe(rate_limited_response(**{
+            "X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "1040"}))
+        self.assertEqual(
+            [self.tracker.delay() for _ in range(3)], [0, 10, 20]
+        )
+
+    def test_exhausted_limit_waits_for_reset(self) -> None:
+        """Test that an exhausted limit pauses until the reset."""
+        self.tracker.observe(rate_limited_response(**{
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1030"}))
+        self.tracker.wait()
+        self.assertEqual(self.sleeps, [30])
+        self.assertEqual(self.tracker.stats["throttled"], 1)
+
+    def test_retry_after(self) -> None:
+        """Test that Retry-After pauses requests."""
+        self.tracker.observe(rate_limited_response(429, **{
+            "Retry-After": "5"}))
+        self.assertEqual(self.tracker.delay(), 5)
+
+    @patch("utils.get_session")
+    def test_get_json_retries_rate_limited(
+        self, mock_get_session: Mock
+    ) -> None:
+        """Test that get_json waits and retries a 429 response."""
+        mock_get_session.return_value.get.side_effect = [
+            rate_limited_response(429, **{"Retry-After": "2"}),
+            rate_limited_response(200),
+        ]
+        previous = configure_rate_limit(self.tracker)
+        self.addCleanup(configure_rate_limit, previous)
+
+        self.assertEqual(get_json("http://example.com"), {"status": 200})
+        self.assertEqual(self.sleeps, [2])
+        self.assertEqual(self.tracker.stats["retries"], 1)
+
+    @patch("utils.get_session")
+    def test_get_json_raises_when_retries_exhausted(
+        self, mock_get_session: Mock
+    ) -> None:
+        """Test that a response still rate limited after the retries raises."""
+        response = rate_limited_response(403, **{
+            "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1001"})
+        response.raise_for_status.side_effect = HTTPError("403 Forbidden")
+        mock_get_session.return_value.get.return_value = response
+        self.tracker.max_retries = 2
+
+        with self.assertRaises(HTTPError):
+            get_json("http://example.com", rate_limit=self.tracker)
+        self.assertEqual(mock_get_session.return_value.get.call_count, 3)
+        response.json.assert_not_called()
+
+
 class TestMemoize(unittest.TestCase):
     """Test cases for the memoize decorator."""
 
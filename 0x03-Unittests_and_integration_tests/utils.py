@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
 """Generic utilities for github org client.
 """
+import os
+import json
+import hashlib
+import time
+import tempfile
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from functools import wraps
 from typing import (
     Mapping,
@@ -9,14 +16,34 @@ from typing import (
     Any,
     Dict,
     Callable,
+    Optional,
+    Tuple,
+    Union,
 )
 
 __all__ = [
+    "HTTPCache",
+    "RateLimitTracker",
     "access_nested_map",
+    "configure_http_cache",
+    "configure_rate_limit",
+    "configure_session",
+    "connection_stats",
     "get_json",
+    "get_json_page",
+    "get_session",
     "memoize",
 ]
 
+DEFAULT_TIMEOUT = (3.05, 30)
+DEFAULT_POOL_SIZE = 10
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT
+_http_cache: Optional["HTTPCache"] = None
+_rate_limit: Optional["RateLimitTracker"] = None
+
 
 def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     """Access nested map with key path.
@@ -40,11 +67,343 @@ def access_nested_map(nested_map: Mapping, path: Sequence) -> Any:
     return nested_map
 
 
-def get_json(url: str) -> Dict:
+def _build_session(pool_size: int) -> requests.Session:
+    """Create a session with a keep-alive connection pool and gzip enabled.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = "gzip, deflate"
+    return session
+
+
+def configure_session(
+    timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> requests.Session:
+    """Replace the shared HTTP session used by get_json.
+    Parameters
+    ----------
+    timeout: float or (connect, read) tuple
+        Timeout in seconds applied to every request
+    pool_size: int
+        Keep-alive connections kept per host (and number of hosts pooled)
+    """
+    global _session, _timeout
+    session = _build_session(pool_size)
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session, _timeout = session, timeout
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the shared, connection-pooling HTTP session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session(DEFAULT_POOL_SIZE)
+    return _session
+
+
+def connection_stats() -> Dict[str, int]:
+    """Count requests sent through the shared session and how many of them
+    reused a keep-alive connection instead of opening a new one.
+    Only hosts still held by the connection pool are counted.
+    """
+    requests_sent = new_connections = 0
+    adapter = get_session().get_adapter("https://")
+    pools = adapter.poolmanager.pools
+    for key in pools.keys():
+        pool = pools[key]
+        requests_sent += pool.num_requests
+        new_connections += pool.num_connections
+    return {
+        "requests": requests_sent,
+        "new_connections": new_connections,
+        "reused_connections": requests_sent - new_connections,
+    }
+
+
+class HTTPCache:
+    """On-disk cache of JSON responses and their validators.
+    Entries are stored one file per URL; once the directory grows past
+    `max_bytes` the least recently used entries are evicted.
+    Safe to share between threads: stores and evictions are serialized.
+    """
+
+    def __init__(
+        self, directory: str, max_bytes: int = 50 * 1024 * 1024
+    ) -> None:
+        """Init method of HTTPCache"""
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def count(self, name: str) -> None:
+        """Increment one of the stats counters"""
+        with self._lock:
+            self.stats[name] += 1
+
+    def _path(self, url: str) -> str:
+        """File holding the entry of a URL"""
+        return os.path.join(
+            self.directory, hashlib.sha256(url.encode()).hexdigest() + ".json"
+        )
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry of a URL (marking it recently used)"""
+        path = self._path(url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def set(self, url: str, etag: Optional[str],
+            last_modified: Optional[str], body: Any,
+            links: Optional[Dict[str, str]] = None) -> None:
+        """Store a response body with its validators and Link header URLs"""
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+            "links": links or {},
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        with self._lock:
+            os.replace(tmp_path, self._path(url))
+            self.stats["stores"] += 1
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until under max_bytes
+        (called with the lock held)
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    info = entry.stat()
+                except FileNotFoundError:
+                    # Removed by another process sharing the directory
+                    continue
+                entries.append((info.st_mtime, info.st_size, entry.path))
+                total += info.st_size
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            self.stats["evictions"] += 1
+
+
+def configure_http_cache(
+    directory: Optional[str], max_bytes: int = 50 * 1024 * 1024
+) -> Optional[HTTPCache]:
+    """Enable the conditional request cache of get_json (None disables it).
+    """
+    global _http_cache
+    _http_cache = HTTPCache(directory, max_bytes) if directory else None
+    return _http_cache
+
+
+class RateLimitTracker:
+    """Adaptive throttle driven by GitHub's rate limit headers.
+    Every response updates the known X-RateLimit-Remaining / -Reset; while
+    plenty of requests are left nothing waits, once `reserve` or fewer are
+    left the remaining ones are spread evenly until the reset, and a
+    Retry-After (or an exhausted limit) pauses every thread until then.
+    Thread-safe: one tracker can be shared by every thread passing it to
+    get_json (or configured for all calls with configure_rate_limit).
+    """
+
+    def __init__(
+        self,
+        reserve: int = 10,
+        max_retries: int = 3,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Init method of RateLimitTracker"""
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self._resume_at = 0.0
+        self._next_slot = 0.0
+        self.stats = {"throttled": 0, "waited": 0.0, "retries": 0}
+
+    @staticmethod
+    def _header(response: requests.Response, name: str) -> Optional[int]:
+        """Integer value of a response header, if present"""
+        try:
+            return int(response.headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def observe(self, response: requests.Response) -> None:
+        """Update the limits from a response's headers"""
+        remaining = self._header(response, "X-RateLimit-Remaining")
+        reset_at = self._header(response, "X-RateLimit-Reset")
+        retry_after = self._header(response, "Retry-After")
+        with self._lock:
+            now = self._clock()
+            if remaining is not None:
+                self.remaining = remaining
+            if reset_at is not None:
+                self.reset_at = float(reset_at)
+            if retry_after is not None:
+                self._resume_at = max(self._resume_at, now + retry_after)
+            elif self.remaining == 0 and self.reset_at is not None:
+                self._resume_at = max(self._resume_at, self.reset_at)
+
+    def is_rate_limited(self, response: requests.Response) -> bool:
+        """Whether a response was rejected by the rate limit"""
+        return response.status_code == 429 or (
+            response.status_code == 403 and (
+                self._header(response, "Retry-After") is not None
+                or self._header(response, "X-RateLimit-Remaining") == 0
+            )
+        )
+
+    def should_retry(self, response: requests.Response, attempt: int) -> bool:
+        """Whether a response rejected by the rate limit should be retried"""
+        if attempt >= self.max_retries or not self.is_rate_limited(response):
+            return False
+        with self._lock:
+            self.stats["retries"] += 1
+        return True
+
+    def delay(self) -> float:
+        """Reserve the next request slot and return how long to wait for it"""
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._resume_at)
+            if (self.remaining is None or self.reset_at is None
+                    or self.reset_at <= start):
+                return start - now
+            if self.remaining <= 0:
+                start = self.reset_at
+            elif self.remaining <= self.reserve:
+                start = max(start, self._next_slot)
+                interval = max(self.reset_at - start, 0.0) / (
+                    self.remaining + 1
+                )
+                self._next_slot = start + interval
+                self.remaining -= 1
+            return start - now
+
+    def wait(self) -> None:
+        """Sleep until the next request may be sent"""
+        seconds = self.delay()
+        if seconds > 0:
+            with self._lock:
+                self.stats["throttled"] += 1
+                self.stats["waited"] += seconds
+            self._sleep(seconds)
+
+
+def configure_rate_limit(
+    tracker: Optional[RateLimitTracker],
+) -> Optional[RateLimitTracker]:
+    """Make get_json honour `tracker` (None disables it).
+    Returns the previously configured tracker so it can be restored.
+    """
+    global _rate_limit
+    previous, _rate_limit = _rate_limit, tracker
+    return previous
+
+
+def get_json(
+    url: str, rate_limit: Optional[RateLimitTracker] = None
+) -> Dict:
     """Get JSON from remote URL.
+    The request goes through the shared session, so connections to the
+    same host are kept alive and reused between calls. When the HTTP cache
+    is configured, cached responses are revalidated with If-None-Match /
+    If-Modified-Since and a 304 answer is served from the cache.
+    The request is throttled by `rate_limit`, or by the tracker set with
+    configure_rate_limit when none is given.
+    """
+    return _read_json(url, False, rate_limit)[0]
+
+
+def get_json_page(
+    url: str, rate_limit: Optional[RateLimitTracker] = None
+) -> Tuple[Any, Dict[str, str]]:
+    """Get JSON from remote URL along with its pagination links.
+    Returns the payload and a {rel: url} dict built from the Link header
+    (e.g. "next" and "last" for paginated GitHub listings).
     """
-    response = requests.get(url)
-    return response.json()
+    return _read_json(url, True, rate_limit)
+
+
+def _links(response: requests.Response) -> Dict[str, str]:
+    """{rel: url} dict of a response's Link header"""
+    return {rel: link["url"] for rel, link in response.links.items()}
+
+
+def _read_json(
+    url: str, with_links: bool, rate_limit: Optional[RateLimitTracker]
+) -> Tuple[Any, Dict[str, str]]:
+    """Send a (conditional) GET and return the payload and its links"""
+    cache = _http_cache
+    entry = cache.get(url) if cache is not None else None
+    kwargs: Dict[str, Any] = {"timeout": _timeout}
+    if entry is not None:
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        kwargs["headers"] = headers
+
+    tracker = rate_limit if rate_limit is not None else _rate_limit
+    for attempt in range(tracker.max_retries + 1 if tracker else 1):
+        if tracker is not None:
+            tracker.wait()
+        response = get_session().get(url, **kwargs)
+        if tracker is None:
+            break
+        tracker.observe(response)
+        if not tracker.should_retry(response, attempt):
+            if tracker.is_rate_limited(response):
+                # Out of retries: report the rejection, not its error body
+                response.raise_for_status()
+            break
+    if entry is not None and response.status_code == 304:
+        cache.count("hits")
+        return entry["body"], entry.get("links", {})
+
+    payload = response.json()
+    links = _links(response) if with_links else {}
+    if cache is not None:
+        cache.count("misses")
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            links = links or _links(response)
+            cache.set(url, etag, last_modified, payload, links)
+    return payload, links
 
 
 def memoize(fn: Callable) -> Callable:
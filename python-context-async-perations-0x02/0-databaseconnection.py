@@ -2,27 +2,205 @@
 """
 A class-based context manager that handles opening and closing
 SQLite database connections automatically.
+It can also borrow connections from a bounded, thread-safe pool so short
+request-scoped `with` blocks do not pay the connect cost every time.
 """
 
+import time
 import sqlite3
+import threading
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of SQLite connections.
+    Idle connections and the open-connection count are guarded by one
+    condition, notified whenever a connection or a slot becomes free and when
+    the pool is closed, so waiting threads never miss freed capacity.
+    """
+
+    def __init__(self, db_name, max_size=5, max_lifetime=300.0, wait_timeout=5.0, health_check=True):
+        """
+        :param db_name: Database file the connections are opened on
+        :param max_size: Maximum number of open connections
+        :param max_lifetime: Seconds after which a connection is closed and replaced
+        :param wait_timeout: Seconds to wait for a free connection before PoolTimeout
+        :param health_check: Run `SELECT 1` on a connection before lending it
+        """
+        self.db_name = db_name
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.wait_timeout = wait_timeout
+        self.health_check = health_check
+        self._idle = []
+        self._opened_at = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._size = 0
+        self._closed = False
+        self.metrics = {
+            "created": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "borrowed": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "max_wait_time": 0.0,
+            "timeouts": 0,
+        }
+
+    def _count(self, metric):
+        """Increment a pool metric."""
+        with self._lock:
+            self.metrics[metric] += 1
+
+    def _connect(self):
+        """Open a new connection usable from any thread (one thread at a time)."""
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        self._opened_at[conn] = time.monotonic()
+        self._count("created")
+        return conn
+
+    def _free_slot(self):
+        """Give back the slot of a connection that was closed or never opened."""
+        with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    def _discard(self, conn):
+        """Close a connection that is leaving the pool, freeing its slot."""
+        self._opened_at.pop(conn, None)
+        self._free_slot()
+        conn.close()
+
+    def _open(self):
+        """Open a connection in a slot reserved by _take, freeing it if connecting fails."""
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            self._free_slot()
+            raise
+
+    def _is_healthy(self, conn):
+        """Return True if the connection still answers a trivial query."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _take(self):
+        """
+        Return an idle connection, or None once a slot is reserved for a new one.
+        Blocks up to `wait_timeout` seconds while the pool is full, recording how
+        long it waited.
+        """
+        started = None
+        with self._available:
+            try:
+                while True:
+                    if self._closed:
+                        raise sqlite3.ProgrammingError("Cannot acquire from a closed pool.")
+                    if self._idle:
+                        return self._idle.pop()
+                    if self._size < self.max_size:
+                        self._size += 1
+                        return None
+                    if started is None:
+                        started = time.monotonic()
+                        self.metrics["waits"] += 1
+                    remaining = started + self.wait_timeout - time.monotonic()
+                    if remaining <= 0:
+                        self.metrics["timeouts"] += 1
+                        raise PoolTimeout(f"No connection available within {self.wait_timeout} seconds.")
+                    self._available.wait(remaining)
+            finally:
+                if started is not None:
+                    waited = time.monotonic() - started
+                    self.metrics["wait_time"] += waited
+                    self.metrics["max_wait_time"] = max(self.metrics["max_wait_time"], waited)
+
+    def acquire(self):
+        """Borrow a connection, waiting up to `wait_timeout` seconds for one."""
+        while True:
+            conn = self._take()
+            if conn is None:
+                conn = self._open()
+                self._count("borrowed")
+                return conn
+
+            # Stale or broken connections free their slot and go back through _take
+            if time.monotonic() - self._opened_at[conn] > self.max_lifetime:
+                self._count("recycled")
+                self._discard(conn)
+            elif self.health_check and not self._is_healthy(conn):
+                self._count("unhealthy")
+                self._discard(conn)
+            else:
+                self._count("borrowed")
+                return conn
+
+    def release(self, conn):
+        """
+        Return a borrowed connection, rolling back anything left uncommitted.
+        A connection that cannot roll back is closed instead; its free slot lets
+        the next borrower open a fresh one.
+        """
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._count("unhealthy")
+            self._discard(conn)
+            return
+        with self._available:
+            if not self._closed:
+                self._idle.append(conn)
+                self._available.notify()
+                return
+        self._discard(conn)
+
+    def close(self):
+        """Close every idle connection and wake waiters; borrowed ones are closed when released."""
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._available.notify_all()
+        for conn in idle:
+            self._discard(conn)
 
 
 class DatabaseConnection:
     """Custom context manager for SQLite database connections."""
 
     def __init__(self, db_name):
+        """
+        :param db_name: Database file to open, or a ConnectionPool to borrow from
+        """
         self.db_name = db_name
+        self.pool = db_name if isinstance(db_name, ConnectionPool) else None
         self.conn = None
 
     def __enter__(self):
-        """Establish a database connection when entering the context."""
-        self.conn = sqlite3.connect(self.db_name)
+        """Establish (or borrow) a database connection when entering the context."""
+        if self.pool is not None:
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = sqlite3.connect(self.db_name)
         return self.conn
 
     def __exit__(self, exc_type, exc_value, traceback):
-        """Ensure the database connection is closed properly."""
+        """Ensure the database connection is closed (or returned to its pool) properly."""
         if self.conn:
-            self.conn.close()
+            if self.pool is not None:
+                self.pool.release(self.conn)
+            else:
+                self.conn.close()
+            self.conn = None
 
 
 # Example usage
@@ -31,4 +209,11 @@ if __name__ == "__main__":
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users")
         results = cursor.fetchall()
-        print(results)
\ No newline at end of file
+        print(results)
+
+    pool = ConnectionPool("users.db", max_size=2)
+    for _ in range(3):
+        with DatabaseConnection(pool) as conn:
+            print(conn.execute("SELECT COUNT(*) FROM users").fetchone())
+    print(pool.metrics)
+    pool.close()
@@ -2,34 +2,141 @@
 """
 A reusable class-based context manager that handles both
 database connection and query execution automatically.
+Results are either fetched at once or streamed in chunks, and ExecuteBatch
+runs one statement over many parameter tuples in a single transaction.
 """
 
+import time
 import sqlite3
+import itertools
 
 
 class ExecuteQuery:
     """Custom context manager to execute a given SQL query safely."""
 
-    def __init__(self, db_name, query, params=None):
+    def __init__(self, db_name, query, params=None, stream=False, chunk_size=500, row_factory=None):
+        """
+        :param db_name: Database file to open
+        :param query: SQL query to execute
+        :param params: Query parameters
+        :param stream: Yield rows lazily instead of returning a fully fetched list
+        :param chunk_size: Rows fetched per `fetchmany` call in streaming mode
+        :param row_factory: Optional sqlite3 row factory (e.g. sqlite3.Row)
+        """
         self.db_name = db_name
         self.query = query
         self.params = params or ()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.row_factory = row_factory
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
-        """Open a database connection, execute the query, and return results."""
+        """
+        Open a database connection, execute the query, and return results.
+        In streaming mode the result is an iterator reading `chunk_size` rows
+        at a time, so memory stays constant; it is only valid inside the block.
+        """
         self.conn = sqlite3.connect(self.db_name)
+        if self.row_factory is not None:
+            self.conn.row_factory = self.row_factory
         self.cursor = self.conn.cursor()
         self.cursor.execute(self.query, self.params)
+        if self.stream:
+            return self._iter_rows()
         return self.cursor.fetchall()
 
+    def _iter_rows(self):
+        """Yield the query rows chunk by chunk until the cursor is exhausted."""
+        while True:
+            if self.cursor is None:
+                raise sqlite3.ProgrammingError("Streamed results cannot be read after the with block.")
+            rows = self.cursor.fetchmany(self.chunk_size)
+            if not rows:
+                return
+            yield from rows
+
     def __exit__(self, exc_type, exc_value, traceback):
         """Close the database connection gracefully."""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.conn:
             self.conn.close()
+            self.conn = None
+
+
+class BatchResult:
+    """Outcome of an ExecuteBatch block."""
+
+    def __init__(self):
+        self.rows_submitted = 0
+        self.rows_affected = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        """Throughput of the whole block, commit included."""
+        return self.rows_submitted / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return (f"BatchResult(rows_submitted={self.rows_submitted}, rows_affected={self.rows_affected}, "
+                f"batches={self.batches}, elapsed={self.elapsed:.4f}, rows_per_second={self.rows_per_second:.0f})")
+
+
+class ExecuteBatch(ExecuteQuery):
+    """
+    Context manager executing one write statement for many parameter tuples.
+    The tuples are sent in `executemany` chunks inside a single transaction that
+    is committed when the block exits normally and rolled back otherwise; the
+    BatchResult returned by the context is complete once the block has exited.
+    """
+
+    def __init__(self, db_name, query, rows, batch_size=500):
+        """
+        :param db_name: Database file to open
+        :param query: INSERT/UPDATE/DELETE statement with placeholders
+        :param rows: Iterable of parameter tuples (consumed lazily)
+        :param batch_size: Parameter tuples per `executemany` call
+        """
+        super().__init__(db_name, query)
+        self.rows = rows
+        self.batch_size = batch_size
+        self.result = BatchResult()
+        self._started = None
+
+    def __enter__(self):
+        """Open a connection and run every batch inside one transaction."""
+        self._started = time.perf_counter()
+        self.conn = sqlite3.connect(self.db_name)
+        self.cursor = self.conn.cursor()
+        try:
+            self.cursor.execute("BEGIN")
+            rows = iter(self.rows)
+            while True:
+                chunk = list(itertools.islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                self.cursor.executemany(self.query, chunk)
+                self.result.rows_submitted += len(chunk)
+                self.result.rows_affected += self.cursor.rowcount
+                self.result.batches += 1
+        except BaseException as e:
+            self.__exit__(type(e), e, e.__traceback__)
+            raise
+        return self.result
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Commit (or roll back on error), record throughput and close the connection."""
+        if self.conn:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+        self.result.elapsed = time.perf_counter() - self._started
+        super().__exit__(exc_type, exc_value, traceback)
 
 
 # Example usage
@@ -38,4 +145,15 @@ if __name__ == "__main__":
     params = (25,)
 
     with ExecuteQuery("users.db", query, params) as results:
-        print(results)
\ No newline at end of file
+        print(results)
+
+    # Stream the same rows without materializing them all at once
+    with ExecuteQuery("users.db", query, params, stream=True, row_factory=sqlite3.Row) as rows:
+        for row in rows:
+            print(dict(row))
+
+    # Update many users in one transaction
+    updates = ((f"user{user_id}@example.com", user_id) for user_id in range(1, 1001))
+    with ExecuteBatch("users.db", "UPDATE users SET email = ? WHERE id = ?", updates) as report:
+        pass
+    print(report)
@@ -2,38 +2,332 @@
 """
 Run multiple database queries concurrently using asyncio.gather
 and aiosqlite for asynchronous database operations.
+Fan-outs can share a bounded pool of aiosqlite connections opened in WAL
+mode, so concurrent readers run in parallel without reconnecting per query,
+and large results can be streamed in chunks with backpressure.
+Pooled queries can be instrumented (time waiting for a connection, time queued
+on the aiosqlite worker thread, execution time) alongside an event-loop lag
+monitor, to tell DB-bound from loop-blocked endpoints.
+`run` starts the event loop on uvloop when it is installed.
 """
 
+import math
+import time
 import asyncio
+from contextlib import asynccontextmanager
+
 import aiosqlite
 
+try:
+    import uvloop
+except ImportError:  # uvloop is optional
+    uvloop = None
 
-async def async_fetch_users():
-    """Fetch all users asynchronously from the database."""
+
+class Histogram:
+    """Cumulative latency histogram with Prometheus-style bucket bounds (seconds)."""
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, math.inf)
+
+    def __init__(self):
+        self.counts = [0] * len(self.BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record one observation in seconds."""
+        for index, bound in enumerate(self.BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """Return count, sum and cumulative bucket counts."""
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.BUCKETS, self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == math.inf else str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class QueryMetrics:
+    """Counters and histograms for instrumented async queries and the event loop."""
+
+    HISTOGRAMS = {
+        "pool_wait": "Time waiting for a pooled connection.",
+        "worker_wait": "Time queued on the aiosqlite worker thread before the statement started.",
+        "execution": "Time from statement start until the rows were back on the event loop.",
+        "loop_lag": "Delay of event loop callbacks beyond their scheduled time.",
+    }
+
+    def __init__(self):
+        self.queries = 0
+        self.errors = 0
+        self.histograms = {name: Histogram() for name in self.HISTOGRAMS}
+
+    def observe(self, name, value):
+        """Record an observation (seconds) in one of the histograms."""
+        self.histograms[name].observe(max(value, 0.0))
+
+    def snapshot(self):
+        """Return every counter and histogram as a dict."""
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            **{name: histogram.snapshot() for name, histogram in self.histograms.items()},
+        }
+
+    def to_prometheus(self, prefix="async_db"):
+        """Export the metrics in the Prometheus text format."""
+        lines = [
+            f"# TYPE {prefix}_queries_total counter",
+            f"{prefix}_queries_total {self.queries}",
+            f"# TYPE {prefix}_query_errors_total counter",
+            f"{prefix}_query_errors_total {self.errors}",
+        ]
+        for name, help_text in self.HISTOGRAMS.items():
+            metric = f"{prefix}_{name}_seconds"
+            snapshot = self.histograms[name].snapshot()
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{metric}_sum {snapshot['sum']:.6f}")
+            lines.append(f"{metric}_count {snapshot['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class LoopLagMonitor:
+    """Periodically measures how late the event loop runs a scheduled wake-up."""
+
+    def __init__(self, metrics, interval=0.1):
+        self.metrics = metrics
+        self.interval = interval
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.metrics.observe("loop_lag", loop.time() - scheduled)
+
+    def start(self):
+        """Start sampling on the running loop."""
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def __aenter__(self):
+        return self.start()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+
+class AsyncConnectionPool:
+    """Bounded pool of aiosqlite connections shared by concurrent queries."""
+
+    def __init__(self, db_name="users.db", size=4, wal=True, metrics=None):
+        """
+        :param db_name: Database file the connections are opened on
+        :param size: Number of connections (each runs on its own worker thread)
+        :param wal: Switch the database to WAL journaling so readers do not block
+        :param metrics: Optional QueryMetrics receiving per-query timings
+        """
+        self.db_name = db_name
+        self.size = size
+        self.wal = wal
+        self.metrics = metrics
+        self._idle = asyncio.Queue()
+        self._connections = []
+        self._statement_started = {}
+        self.stats = {"queries": 0, "total_time": 0.0, "max_time": 0.0}
+
+    async def open(self):
+        """Open every connection of the pool."""
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.db_name)
+            if self.wal and not self._connections:
+                await conn.execute("PRAGMA journal_mode=WAL")
+            if self.metrics is not None:
+                # Runs on the connection's worker thread when a statement starts
+                await conn.set_trace_callback(
+                    lambda _sql, conn=conn: self._statement_started.__setitem__(conn, time.perf_counter())
+                )
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+        return self
+
+    async def close(self):
+        """Close every connection of the pool."""
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connection, waiting while all of them are busy."""
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def fetch(self, query, params=()):
+        """Run a query on a pooled connection, record its duration and return all rows."""
+        requested = time.perf_counter()
+        async with self.acquire() as conn:
+            started = time.perf_counter()
+            self._statement_started.pop(conn, None)
+            try:
+                async with conn.execute(query, params) as cursor:
+                    results = await cursor.fetchall()
+            except Exception:
+                if self.metrics is not None:
+                    self.metrics.errors += 1
+                raise
+            finished = time.perf_counter()
+            statement_started = self._statement_started.pop(conn, started)
+        elapsed = finished - started
+        if self.metrics is not None:
+            self.metrics.queries += 1
+            self.metrics.observe("pool_wait", started - requested)
+            self.metrics.observe("worker_wait", statement_started - started)
+            self.metrics.observe("execution", finished - statement_started)
+        self.stats["queries"] += 1
+        self.stats["total_time"] += elapsed
+        self.stats["max_time"] = max(self.stats["max_time"], elapsed)
+        return results
+
+
+async def _fetch(query, pool=None):
+    """Run a query on the pool if given, otherwise on a dedicated connection."""
+    if pool is not None:
+        return await pool.fetch(query)
     async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users") as cursor:
-            results = await cursor.fetchall()
-            print("All Users:", results)
-            return results
+        async with db.execute(query) as cursor:
+            return await cursor.fetchall()
+
+
+async def _produce_chunks(query, params, pool, db_name, chunk_size, buffer):
+    """Read a query in chunks into `buffer`, blocking while the consumer lags behind."""
+    async def read(conn):
+        async with conn.execute(query, params) as cursor:
+            while True:
+                rows = await cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                await buffer.put(rows)
+
+    try:
+        if pool is not None:
+            async with pool.acquire() as conn:
+                await read(conn)
+        else:
+            async with aiosqlite.connect(db_name) as conn:
+                await read(conn)
+    except Exception as e:
+        await buffer.put(e)
+    else:
+        await buffer.put(None)
+
+
+async def stream_chunks(query, params=(), pool=None, db_name="users.db", chunk_size=500, buffer_size=4):
+    """
+    Yield the rows of a query as lists of up to `chunk_size` rows.
+    A background reader stays at most `buffer_size` chunks ahead of the
+    consumer, so a slow consumer (e.g. writing to a socket) pauses the reads
+    and memory stays flat however large the table is. To stop early, close the
+    generator (e.g. `async with contextlib.aclosing(...)`) so the reader is
+    cancelled and its connection released right away.
+    """
+    buffer = asyncio.Queue(maxsize=buffer_size)
+    producer = asyncio.ensure_future(_produce_chunks(query, params, pool, db_name, chunk_size, buffer))
+    try:
+        while True:
+            chunk = await buffer.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
 
+async def stream_rows(query, params=(), pool=None, db_name="users.db", chunk_size=500, buffer_size=4):
+    """Yield the rows of a query one by one, read in chunks with backpressure."""
+    async for chunk in stream_chunks(query, params, pool, db_name, chunk_size, buffer_size):
+        for row in chunk:
+            yield row
 
-async def async_fetch_older_users():
+
+async def async_fetch_users(pool=None):
+    """Fetch all users asynchronously from the database."""
+    results = await _fetch("SELECT * FROM users", pool)
+    print("All Users:", results)
+    return results
+
+
+async def async_fetch_older_users(pool=None):
     """Fetch users older than 40 asynchronously."""
-    async with aiosqlite.connect("users.db") as db:
-        async with db.execute("SELECT * FROM users WHERE age > 40") as cursor:
-            results = await cursor.fetchall()
-            print("Users older than 40:", results)
-            return results
+    results = await _fetch("SELECT * FROM users WHERE age > 40", pool)
+    print("Users older than 40:", results)
+    return results
 
 
-async def fetch_concurrently():
-    """Run multiple asynchronous queries concurrently."""
+async def fetch_concurrently(pool=None):
+    """Run multiple asynchronous queries concurrently (sharing `pool` if given)."""
     results = await asyncio.gather(
-        async_fetch_users(),
-        async_fetch_older_users()
+        async_fetch_users(pool),
+        async_fetch_older_users(pool)
     )
     return results
 
 
+async def fetch_concurrently_pooled():
+    """Run the concurrent queries over a shared connection pool."""
+    metrics = QueryMetrics()
+    async with LoopLagMonitor(metrics), AsyncConnectionPool("users.db", size=2, metrics=metrics) as pool:
+        results = await fetch_concurrently(pool)
+        print("Pool stats:", pool.stats)
+    print(metrics.to_prometheus())
+    return results
+
+
+def run(main, use_uvloop=None):
+    """
+    Run a coroutine to completion on a fresh event loop.
+    :param main: Coroutine to run
+    :param use_uvloop: True to require uvloop, False for the default asyncio loop,
+                       None to use uvloop only if it is installed
+    """
+    if use_uvloop is None:
+        use_uvloop = uvloop is not None
+    if not use_uvloop:
+        return asyncio.run(main)
+    if uvloop is None:
+        main.close()
+        raise RuntimeError("uvloop is not installed")
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(main)
+
+
 if __name__ == "__main__":
-    asyncio.run(fetch_concurrently())
\ No newline at end of file
+    run(fetch_concurrently_pooled())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent aiosqlite fan-outs: one connection per query
+(the original 3-concurrent approach) against a shared AsyncConnectionPool,
+and, with --loops, the default asyncio loop against uvloop (when installed)
+for startup time and throughput of many small concurrent queries.
+
+Usage:
+    ./4-benchmark.py [--db users.db] [--queries 200] [--pool-size 4] [--loops]
+"""
+
+import time
+import asyncio
+import argparse
+
+import aiosqlite
+
+concurrent = __import__('3-concurrent')
+AsyncConnectionPool = concurrent.AsyncConnectionPool
+
+QUERIES = ("SELECT * FROM users", "SELECT * FROM users WHERE age > 40")
+
+
+async def per_call_connection(db_name, query):
+    """Open a dedicated connection (and worker thread) for a single query."""
+    async with aiosqlite.connect(db_name) as db:
+        async with db.execute(query) as cursor:
+            return await cursor.fetchall()
+
+
+async def bench_per_call(db_name, count):
+    """Fan out `count` queries, each on its own connection."""
+    return await asyncio.gather(*(per_call_connection(db_name, QUERIES[i % 2]) for i in range(count)))
+
+
+async def bench_pool(db_name, count, size):
+    """Fan out `count` queries over a shared pool of `size` connections."""
+    async with AsyncConnectionPool(db_name, size=size) as pool:
+        return await asyncio.gather(*(pool.fetch(QUERIES[i % 2]) for i in range(count)))
+
+
+async def bench_small_queries(db_name, count, size):
+    """Return (startup seconds, query seconds) for `count` point lookups over a pool."""
+    started = time.perf_counter()
+    async with AsyncConnectionPool(db_name, size=size) as pool:
+        opened = time.perf_counter()
+        await asyncio.gather(*(pool.fetch("SELECT * FROM users WHERE id = ?", (i % 1000 + 1,))
+                               for i in range(count)))
+        return opened - started, time.perf_counter() - opened
+
+
+def bench_loops(db_name, count, size):
+    """Compare the default asyncio loop with uvloop on many small concurrent queries."""
+    loops = {"asyncio": False}
+    if concurrent.uvloop is not None:
+        loops["uvloop"] = True
+    else:
+        print("uvloop is not installed; benchmarking the default loop only")
+    for label, use_uvloop in loops.items():
+        started = time.perf_counter()
+        startup, queries = concurrent.run(bench_small_queries(db_name, count, size), use_uvloop=use_uvloop)
+        total = time.perf_counter() - started
+        print(f"{label:<12}startup {startup * 1000:>8.1f} ms  queries {queries * 1000:>8.1f} ms"
+              f"{count / queries:>12.0f} queries/s  total {total * 1000:>8.1f} ms")
+
+
+def timed(label, coroutine, count):
+    """Run a benchmark coroutine and print its wall time and throughput."""
+    started = time.perf_counter()
+    asyncio.run(coroutine)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28}{elapsed * 1000:>10.1f} ms{count / elapsed:>12.0f} queries/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="users.db", help="database file (default users.db)")
+    parser.add_argument("--queries", type=int, default=200, help="concurrent queries per run")
+    parser.add_argument("--pool-size", type=int, default=4, help="connections in the pool")
+    parser.add_argument("--loops", action="store_true", help="compare event loop implementations instead")
+    args = parser.parse_args()
+
+    if args.loops:
+        bench_loops(args.db, args.queries, args.pool_size)
+    else:
+        per_call = timed("connection per query", bench_per_call(args.db, args.queries), args.queries)
+        pooled = timed(f"pool of {args.pool_size}", bench_pool(args.db, args.queries, args.pool_size), args.queries)
+        print(f"speedup: {per_call / pooled:.2f}x")
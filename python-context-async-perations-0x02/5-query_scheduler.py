@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+A bounded-concurrency scheduler for fan-out query workloads.
+Queries are queued in priority lanes and run by a fixed number of workers
+over a shared AsyncConnectionPool, each with an optional timeout; results are
+streamed back in completion order and, in fail-fast mode, the first failure
+cancels everything still running.
+"""
+
+import time
+import asyncio
+import itertools
+from collections import namedtuple
+
+AsyncConnectionPool = __import__('3-concurrent').AsyncConnectionPool
+
+# Priority lanes: lower values run first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+QueryResult = namedtuple("QueryResult", ["name", "rows", "error", "elapsed"])
+
+
+class QueryScheduler:
+    """Runs many async queries with a concurrency limit and priority lanes."""
+
+    def __init__(self, pool, concurrency=4, timeout=None, fail_fast=False):
+        """
+        :param pool: Object with an async `fetch(query, params)` (e.g. AsyncConnectionPool)
+        :param concurrency: Maximum number of queries running at once
+        :param timeout: Default per-query timeout in seconds (None for no limit)
+        :param fail_fast: Cancel the remaining queries and raise on the first failure
+        """
+        self.pool = pool
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.fail_fast = fail_fast
+        self._jobs = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._pending = 0
+
+    def submit(self, query, params=(), priority=PRIORITY_NORMAL, timeout=None, name=None):
+        """Queue a query; jobs may also be submitted while `results()` is running."""
+        sequence = next(self._order)
+        job = (name if name is not None else sequence, query, params, timeout or self.timeout)
+        self._jobs.put_nowait((priority, sequence, job))
+        self._pending += 1
+
+    async def _worker(self, results):
+        """Run queued jobs one at a time until cancelled."""
+        while True:
+            _, _, (name, query, params, timeout) = await self._jobs.get()
+            started = time.perf_counter()
+            try:
+                rows = await asyncio.wait_for(self.pool.fetch(query, params), timeout)
+                result = QueryResult(name, rows, None, time.perf_counter() - started)
+            except asyncio.TimeoutError as e:
+                result = QueryResult(name, None, TimeoutError(f"Query {name!r} timed out after {timeout} seconds"),
+                                     time.perf_counter() - started)
+                result.error.__cause__ = e
+            except Exception as e:
+                result = QueryResult(name, None, e, time.perf_counter() - started)
+            results.put_nowait(result)
+
+    async def results(self):
+        """
+        Run every queued job and yield QueryResults as they complete.
+        Failed queries are yielded with their exception unless `fail_fast` is
+        set, in which case the error is raised after cancelling the other jobs.
+        """
+        results = asyncio.Queue()
+        workers = [asyncio.ensure_future(self._worker(results)) for _ in range(self.concurrency)]
+        try:
+            while self._pending:
+                result = await results.get()
+                self._pending -= 1
+                if result.error is not None and self.fail_fast:
+                    raise result.error
+                yield result
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            while not self._jobs.empty():
+                self._jobs.get_nowait()
+            self._pending = 0
+
+
+async def main():
+    """Run a fan-out of lookups, dashboard queries first."""
+    async with AsyncConnectionPool("users.db", size=4) as pool:
+        scheduler = QueryScheduler(pool, concurrency=4, timeout=5)
+        for user_id in range(1, 101):
+            scheduler.submit("SELECT * FROM users WHERE id = ?", (user_id,), priority=PRIORITY_LOW,
+                             name=f"user-{user_id}")
+        scheduler.submit("SELECT COUNT(*) FROM users", priority=PRIORITY_HIGH, name="count")
+        scheduler.submit("SELECT AVG(age) FROM users", priority=PRIORITY_HIGH, name="average-age")
+
+        async for result in scheduler.results():
+            print(f"{result.name}: {result.rows if result.error is None else result.error} "
+                  f"({result.elapsed * 1000:.2f} ms)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
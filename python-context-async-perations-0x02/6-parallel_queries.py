@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Run independent SQLite queries in parallel worker processes.
+Each worker opens its own read-only connection, runs the query and
+post-processes the rows before returning, so CPU-heavy reporting work runs
+on all cores instead of serializing on the GIL, and only compact results
+are sent back to the parent process.
+"""
+
+import os
+import time
+import sqlite3
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# `postprocess` must be a module-level function so it can be pickled
+QueryJob = namedtuple("QueryJob", ["name", "query", "params", "postprocess"], defaults=[(), None])
+JobResult = namedtuple("JobResult", ["name", "result", "rows", "elapsed"])
+
+
+def run_job(db_path, job):
+    """Worker: run one job on a fresh read-only connection and post-process its rows."""
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(job.query, job.params).fetchall()
+    finally:
+        conn.close()
+    result = job.postprocess(rows) if job.postprocess else rows
+    return JobResult(job.name, result, len(rows), time.perf_counter() - started)
+
+
+def run_parallel(db_name, jobs, max_workers=None):
+    """
+    Run jobs across a process pool and return {name: JobResult}.
+    :param db_name: Database file shared (read-only) by every worker
+    :param jobs: Iterable of QueryJob
+    :param max_workers: Worker processes (defaults to the number of CPUs)
+    """
+    db_path = os.path.abspath(db_name)
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_job, db_path, job) for job in jobs]
+        for future in as_completed(futures):
+            job_result = future.result()
+            results[job_result.name] = job_result
+    return results
+
+
+def age_histogram(rows):
+    """Count users per decade of age (rows: (age,))."""
+    return dict(sorted(Counter(age // 10 * 10 for (age,) in rows).items()))
+
+
+def email_domains(rows, top=5):
+    """Return the most common email domains (rows: (email,))."""
+    return Counter(email.rsplit("@", 1)[-1].lower() for (email,) in rows).most_common(top)
+
+
+def age_summary(rows):
+    """Return count, mean and median age (rows: (age,))."""
+    ages = sorted(age for (age,) in rows)
+    if not ages:
+        return {"count": 0, "mean": None, "median": None}
+    return {"count": len(ages), "mean": sum(ages) / len(ages), "median": ages[len(ages) // 2]}
+
+
+if __name__ == "__main__":
+    report = run_parallel("users.db", [
+        QueryJob("age_histogram", "SELECT age FROM users", postprocess=age_histogram),
+        QueryJob("email_domains", "SELECT email FROM users", postprocess=email_domains),
+        QueryJob("older_users", "SELECT age FROM users WHERE age > ?", (40,), age_summary),
+    ])
+    for name, job_result in report.items():
+        print(f"{name} ({job_result.rows} rows, {job_result.elapsed * 1000:.1f} ms): {job_result.result}")
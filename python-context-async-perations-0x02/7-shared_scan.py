@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Shared scans for concurrent overlapping queries.
+Simple `SELECT * FROM <table> [WHERE ...]` queries issued within the same
+gather window are grouped by table and served by one full scan, with each
+caller's WHERE clause evaluated in Python over the shared rows; any other
+query runs on its own as usual. A group is only scanned when at least one of
+its queries would scan the table anyway (per EXPLAIN QUERY PLAN); lookups
+that can use an index or the rowid run directly. Comparisons follow SQLite's
+rules (column affinity applied to the compared value, NULL < numbers < text
+< blobs), and any condition that cannot be evaluated exactly is run directly
+instead.
+"""
+
+import re
+import asyncio
+import sqlite3
+import operator
+
+AsyncConnectionPool = __import__('3-concurrent').AsyncConnectionPool
+
+_SIMPLE_SELECT = re.compile(r"^\s*SELECT\s+\*\s+FROM\s+(\w+)(?:\s+WHERE\s+(.+?))?\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+_CONDITION = re.compile(r"^\s*(\w+)\s*(==|=|!=|<>|<=|>=|<|>)\s*(\?|-?\d+(?:\.\d+)?|'(?:[^']|'')*')\s*$")
+_AND = re.compile(r"\s+AND\s+", re.IGNORECASE)
+_OPERATORS = {
+    "=": operator.eq, "==": operator.eq, "!=": operator.ne, "<>": operator.ne,
+    "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+}
+_NUMERIC_TEXT = re.compile(r"^\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*$")
+_NUMERIC_AFFINITIES = ("INTEGER", "REAL", "NUMERIC")
+# Implicit rowid names; `SELECT *` does not return them, so they run directly
+_ROWID_ALIASES = ("rowid", "oid", "_rowid_")
+
+
+def parse_simple_select(query, params=()):
+    """
+    Return (table, conditions) for queries a shared scan can serve, else None.
+    Conditions are (column, operator, value) triples joined by AND; only
+    comparisons of a column with a literal or a `?` parameter are supported.
+    """
+    match = _SIMPLE_SELECT.match(query)
+    if not match:
+        return None
+    table, where = match.groups()
+    conditions = []
+    params = list(params)
+    for clause in _AND.split(where) if where else ():
+        condition = _CONDITION.match(clause)
+        if not condition:
+            return None
+        column, op, literal = condition.groups()
+        if literal == "?":
+            if not params:
+                return None
+            value = params.pop(0)
+        elif literal.startswith("'"):
+            value = literal[1:-1].replace("''", "'")
+        else:
+            value = float(literal) if "." in literal else int(literal)
+        conditions.append((column.lower(), _OPERATORS[op], value))
+    if params:
+        return None
+    return table.lower(), conditions
+
+
+def column_affinity(declared_type):
+    """Return the SQLite affinity of a column from its declared type."""
+    declared_type = (declared_type or "").upper()
+    if "INT" in declared_type:
+        return "INTEGER"
+    if any(name in declared_type for name in ("CHAR", "CLOB", "TEXT")):
+        return "TEXT"
+    if "BLOB" in declared_type or not declared_type:
+        return "BLOB"
+    if any(name in declared_type for name in ("REAL", "FLOA", "DOUB")):
+        return "REAL"
+    return "NUMERIC"
+
+
+def _apply_affinity(value, affinity):
+    """
+    Convert a compared value the way SQLite does for a column of `affinity`.
+    Returns (True, value), or (False, None) when the conversion cannot be
+    reproduced exactly and the condition must run in SQLite.
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    if affinity in _NUMERIC_AFFINITIES and isinstance(value, str):
+        if not _NUMERIC_TEXT.match(value):
+            return True, value
+        number = float(value)
+        if number.is_integer() and abs(number) < 2 ** 53:
+            return True, int(number)
+        return False, None
+    if affinity == "TEXT" and isinstance(value, (int, float)):
+        if isinstance(value, float):
+            return False, None
+        return True, str(value)
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return True, value
+    return False, None
+
+
+def _storage_class(value):
+    """Rank values by SQLite's cross-type order: NULL < numbers < text < blobs."""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return 1
+    return 2 if isinstance(value, str) else 3
+
+
+def resolve_conditions(conditions, affinities):
+    """
+    Bind parsed conditions to a table's columns ({name: affinity}).
+    Returns the conditions with column affinity applied to their values, or
+    None if one of them cannot be evaluated exactly outside SQLite.
+    Raises sqlite3.OperationalError for unknown columns, like SQLite does.
+    """
+    resolved = []
+    for column, compare, value in conditions:
+        if column not in affinities and column in _ROWID_ALIASES:
+            return None
+        if column not in affinities:
+            raise sqlite3.OperationalError(f"no such column: {column}")
+        exact, value = _apply_affinity(value, affinities[column])
+        if not exact:
+            return None
+        resolved.append((column, compare, value))
+    return resolved
+
+
+def _matches(row, columns, conditions):
+    """Evaluate AND-ed conditions on a row; like SQL, NULL never matches."""
+    for column, compare, value in conditions:
+        field = row[columns[column]]
+        if field is None or value is None:
+            return False
+        field_class, value_class = _storage_class(field), _storage_class(value)
+        if field_class != value_class:
+            if not compare(field_class, value_class):
+                return False
+        elif not compare(field, value):
+            return False
+    return True
+
+
+def _settle(future, result=None, error=None):
+    """Resolve a waiter's future unless its caller has already given up."""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class SharedScanBatcher:
+    """Collects concurrent queries per table and serves them from one scan."""
+
+    def __init__(self, pool, window=0.0):
+        """
+        :param pool: AsyncConnectionPool the scans and fallback queries run on
+        :param window: Seconds to wait for related queries (0 = same loop tick)
+        """
+        self.pool = pool
+        self.window = window
+        self._waiting = {}
+        self._affinities = {}
+        self._plans = {}
+        self._scans = set()
+        self.stats = {"queries": 0, "scans": 0, "direct": 0}
+
+    async def fetch(self, query, params=()):
+        """Return the rows of a query, sharing a table scan with concurrent queries when possible."""
+        self.stats["queries"] += 1
+        plan = parse_simple_select(query, params)
+        if plan is None:
+            self.stats["direct"] += 1
+            return await self.pool.fetch(query, params)
+
+        table, conditions = plan
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiters = self._waiting.get(table)
+        if waiters is None:
+            waiters = self._waiting[table] = []
+            if self.window:
+                loop.call_later(self.window, self._start_scan, table)
+            else:
+                loop.call_soon(self._start_scan, table)
+        waiters.append((query, params, conditions, future))
+        return await future
+
+    def _start_scan(self, table):
+        """Hand the queries collected for a table to a scan task."""
+        task = asyncio.ensure_future(self._scan(table, self._waiting.pop(table)))
+        self._scans.add(task)
+        task.add_done_callback(self._scans.discard)
+
+    async def _table_affinities(self, table):
+        """
+        Return {column: affinity} for a table, or None if its rows cannot be
+        compared outside SQLite (unknown table, or columns with a collation).
+        """
+        if table not in self._affinities:
+            async with self.pool.acquire() as conn:
+                async with conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE",
+                                        (table,)) as cursor:
+                    schema = await cursor.fetchone()
+                async with conn.execute(f"PRAGMA table_info({table})") as cursor:
+                    info = await cursor.fetchall()
+            if schema is None or not info or "COLLATE" in (schema[0] or "").upper():
+                self._affinities[table] = None
+            else:
+                self._affinities[table] = {name.lower(): column_affinity(declared) for _, name, declared, *_ in info}
+        return self._affinities[table]
+
+    async def _needs_scan(self, query, params):
+        """Return True if SQLite would run the query as a full table scan."""
+        if query not in self._plans:
+            async with self.pool.acquire() as conn:
+                async with conn.execute(f"EXPLAIN QUERY PLAN {query}", params) as cursor:
+                    plan = await cursor.fetchall()
+            self._plans[query] = any(row[-1].upper().startswith("SCAN") for row in plan)
+        return self._plans[query]
+
+    async def _any_needs_scan(self, shared):
+        """Return True if any of the grouped queries would scan the table."""
+        for query, params, _, _ in shared:
+            if await self._needs_scan(query, params):
+                return True
+        return False
+
+    async def _direct(self, query, params, future):
+        """Run one waiter's query on its own."""
+        self.stats["direct"] += 1
+        try:
+            _settle(future, await self.pool.fetch(query, params))
+        except Exception as e:
+            _settle(future, error=e)
+
+    async def _shared_scan(self, table, shared):
+        """Scan a table once and filter its rows for each (query, params, conditions, future)."""
+        if not shared:
+            return
+        async with self.pool.acquire() as conn:
+            async with conn.execute(f"SELECT * FROM {table}") as cursor:
+                columns = {description[0].lower(): index for index, description in enumerate(cursor.description)}
+                rows = await cursor.fetchall()
+        self.stats["scans"] += 1
+        for _, _, conditions, future in shared:
+            _settle(future, [row for row in rows if _matches(row, columns, conditions)])
+
+    async def _scan(self, table, waiters):
+        """Serve every waiter of a table from one scan (or directly if it is alone)."""
+        waiters = [waiter for waiter in waiters if not waiter[3].done()]
+        try:
+            affinities = await self._table_affinities(table) if len(waiters) > 1 else None
+            shared, direct = [], []
+            for query, params, conditions, future in waiters:
+                if affinities is None:
+                    direct.append((query, params, future))
+                    continue
+                try:
+                    resolved = resolve_conditions(conditions, affinities)
+                except sqlite3.OperationalError as e:
+                    _settle(future, error=e)
+                    continue
+                if resolved is None:
+                    direct.append((query, params, future))
+                else:
+                    shared.append((query, params, resolved, future))
+            if len(shared) > 1 and not await self._any_needs_scan(shared):
+                # Every query can use an index or the rowid: a scan would read more
+                direct.extend((query, params, future) for query, params, _, future in shared)
+                shared = []
+            elif len(shared) == 1:
+                query, params, _, future = shared.pop()
+                direct.append((query, params, future))
+
+            await asyncio.gather(
+                self._shared_scan(table, shared),
+                *(self._direct(query, params, future) for query, params, future in direct),
+            )
+        except Exception as e:
+            for _, _, _, future in waiters:
+                _settle(future, error=e)
+
+
+async def fetch_concurrently_shared():
+    """Run the 3-concurrent queries through a shared scan of the users table."""
+    async with AsyncConnectionPool("users.db", size=2) as pool:
+        batcher = SharedScanBatcher(pool)
+        all_users, older_users = await asyncio.gather(
+            batcher.fetch("SELECT * FROM users"),
+            batcher.fetch("SELECT * FROM users WHERE age > ?", (40,)),
+        )
+        print("All Users:", len(all_users), "Users older than 40:", len(older_users))
+        print("Batcher stats:", batcher.stats)
+        return all_users, older_users
+
+
+if __name__ == "__main__":
+    asyncio.run(fetch_concurrently_shared())
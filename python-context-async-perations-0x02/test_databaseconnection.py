@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Unit tests for the ConnectionPool of 0-databaseconnection.py"""
+import os
+import time
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+databaseconnection = __import__('0-databaseconnection')
+ConnectionPool = databaseconnection.ConnectionPool
+DatabaseConnection = databaseconnection.DatabaseConnection
+PoolTimeout = databaseconnection.PoolTimeout
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Unit tests for ConnectionPool"""
+
+    def setUp(self):
+        """Create a small users database"""
+        fd, self.db_name = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_name)
+        with sqlite3.connect(self.db_name) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+            conn.execute("INSERT INTO users VALUES (1, 'Alice')")
+        conn.close()
+
+    def pool(self, **kwargs):
+        """Return a pool on the test database, closed after the test"""
+        pool = ConnectionPool(self.db_name, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def acquire_in_thread(self, pool):
+        """Start acquiring from another thread; returns (thread, outcome list)"""
+        outcome = []
+
+        def run():
+            try:
+                outcome.append(pool.acquire())
+            except Exception as exc:
+                outcome.append(exc)
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, outcome
+
+    def test_reuses_connections(self):
+        """Test that a released connection is lent again"""
+        pool = self.pool(max_size=2)
+        with DatabaseConnection(pool) as first:
+            self.assertEqual(first.execute("SELECT name FROM users").fetchone(), ("Alice",))
+        with DatabaseConnection(pool) as second:
+            self.assertIs(second, first)
+        self.assertEqual(pool.metrics["created"], 1)
+        self.assertEqual(pool.metrics["borrowed"], 2)
+
+    def test_release_rolls_back(self):
+        """Test that uncommitted changes do not survive a release"""
+        pool = self.pool(max_size=1)
+        with DatabaseConnection(pool) as conn:
+            conn.execute("INSERT INTO users VALUES (2, 'Bob')")
+        with DatabaseConnection(pool) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM users").fetchone(), (1,))
+
+    def test_lifetime_recycle(self):
+        """Test that a connection older than max_lifetime is replaced"""
+        pool = self.pool(max_size=1, max_lifetime=60)
+        conn = pool.acquire()
+        pool.release(conn)
+        pool._opened_at[conn] -= 61
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(pool.metrics["recycled"], 1)
+        self.assertEqual(pool.metrics["created"], 2)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        pool.release(fresh)
+
+    def test_unhealthy_connection(self):
+        """Test that an idle connection failing the health check is replaced"""
+        pool = self.pool(max_size=1)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.close()
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, conn)
+        self.assertEqual(fresh.execute("SELECT 1").fetchone(), (1,))
+        self.assertEqual(pool.metrics["unhealthy"], 1)
+        pool.release(fresh)
+
+    def test_broken_release_frees_slot(self):
+        """Test that a waiter is woken when a broken connection is released"""
+        pool = self.pool(max_size=1, wait_timeout=5)
+        conn = pool.acquire()
+        thread, outcome = self.acquire_in_thread(pool)
+        time.sleep(0.05)
+        conn.close()
+        started = time.monotonic()
+        pool.release(conn)
+        thread.join()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsInstance(outcome[0], sqlite3.Connection)
+        self.assertIsNot(outcome[0], conn)
+        self.assertEqual(pool.metrics["unhealthy"], 1)
+        pool.release(outcome[0])
+
+    def test_failed_reconnect(self):
+        """Test that a failed connect gives its slot back to the pool"""
+        pool = self.pool(max_size=1, wait_timeout=0.1)
+        error = sqlite3.OperationalError("unable to open database file")
+        with patch.object(pool, "_connect", side_effect=error):
+            with self.assertRaises(sqlite3.OperationalError):
+                pool.acquire()
+        conn = pool.acquire()
+        self.assertEqual(conn.execute("SELECT 1").fetchone(), (1,))
+        self.assertEqual(pool.metrics["timeouts"], 0)
+        pool.release(conn)
+
+    def test_timeout(self):
+        """Test that PoolTimeout is raised when the pool stays full"""
+        pool = self.pool(max_size=1, wait_timeout=0.05)
+        conn = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.metrics["waits"], 1)
+        self.assertEqual(pool.metrics["timeouts"], 1)
+        self.assertGreaterEqual(pool.metrics["max_wait_time"], 0.05)
+        pool.release(conn)
+
+    def test_close_wakes_waiters(self):
+        """Test that closing the pool fails waiters at once"""
+        pool = self.pool(max_size=1, wait_timeout=5)
+        conn = pool.acquire()
+        thread, outcome = self.acquire_in_thread(pool)
+        time.sleep(0.05)
+        started = time.monotonic()
+        pool.close()
+        thread.join()
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsInstance(outcome[0], sqlite3.ProgrammingError)
+        pool.release(conn)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Unit tests for the shared scans of 7-shared_scan.py"""
+import os
+import sqlite3
+import asyncio
+import tempfile
+import unittest
+
+shared_scan = __import__('7-shared_scan')
+AsyncConnectionPool = shared_scan.AsyncConnectionPool
+SharedScanBatcher = shared_scan.SharedScanBatcher
+
+ROWS = [
+    (1, "Alice", "alice@example.com", 25),
+    (2, "Bob", "bob@example.com", 40),
+    (3, "carol", "carol@example.com", 41),
+    (4, "5", "five@example.com", None),
+    (5, "abc", "abc@example.com", "abc"),
+    (6, "Dave", "dave@example.com", 40.5),
+    (7, None, "none@example.com", 70),
+]
+
+QUERIES = [
+    ("SELECT * FROM users", ()),
+    ("SELECT * FROM users WHERE age > 40", ()),
+    ("SELECT * FROM users WHERE age > '40'", ()),
+    ("SELECT * FROM users WHERE age > ?", ("40",)),
+    ("SELECT * FROM users WHERE age >= ?", (40,)),
+    ("SELECT * FROM users WHERE age = '4e1'", ()),
+    ("SELECT * FROM users WHERE age < 'abd'", ()),
+    ("SELECT * FROM users WHERE age != ?", (40.5,)),
+    ("SELECT * FROM users WHERE name > 5", ()),
+    ("SELECT * FROM users WHERE name = ?", (5,)),
+    ("SELECT * FROM users WHERE name < 'b'", ()),
+    ("SELECT * FROM users WHERE name > ? AND age < 50", ("A",)),
+    ("SELECT * FROM users WHERE id <= 3.5", ()),
+    ("SELECT * FROM users WHERE email = ?", (None,)),
+]
+
+
+class TestSharedScan(unittest.IsolatedAsyncioTestCase):
+    """Shared scans must return exactly what SQLite returns."""
+
+    async def asyncSetUp(self):
+        """Create a users table with mixed-type values."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.directory.name, "users.db")
+        with sqlite3.connect(self.db_name) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+            conn.executemany("INSERT INTO users VALUES (?, ?, ?, ?)", ROWS)
+        conn.close()
+        self.pool = await AsyncConnectionPool(self.db_name, size=2, wal=False).open()
+        self.batcher = SharedScanBatcher(self.pool)
+
+    async def asyncTearDown(self):
+        await self.pool.close()
+        self.directory.cleanup()
+
+    def direct(self, query, params):
+        """Run a query straight on SQLite."""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            return sorted(conn.execute(query, params).fetchall(), key=repr)
+        finally:
+            conn.close()
+
+    async def test_results_match_direct_queries(self):
+        """Every query served by a shared scan matches the direct query."""
+        results = await asyncio.gather(*(self.batcher.fetch(query, params) for query, params in QUERIES))
+        for (query, params), rows in zip(QUERIES, results):
+            with self.subTest(query=query, params=params):
+                self.assertEqual(sorted(rows, key=repr), self.direct(query, params))
+        self.assertEqual(self.batcher.stats["scans"], 1)
+
+    async def test_indexed_lookups_run_directly(self):
+        """Primary-key lookups are not turned into a shared table scan."""
+        first, second = await asyncio.gather(
+            self.batcher.fetch("SELECT * FROM users WHERE id = ?", (1,)),
+            self.batcher.fetch("SELECT * FROM users WHERE id = ?", (2,)),
+        )
+        self.assertEqual(first, self.direct("SELECT * FROM users WHERE id = ?", (1,)))
+        self.assertEqual(second, self.direct("SELECT * FROM users WHERE id = ?", (2,)))
+        self.assertEqual(self.batcher.stats["scans"], 0)
+        self.assertEqual(self.batcher.stats["direct"], 2)
+
+    async def test_lookup_shares_a_needed_scan(self):
+        """A lookup grouped with a query that scans anyway is served by that scan."""
+        await asyncio.gather(
+            self.batcher.fetch("SELECT * FROM users WHERE id = ?", (1,)),
+            self.batcher.fetch("SELECT * FROM users WHERE age > 40"),
+        )
+        self.assertEqual(self.batcher.stats["scans"], 1)
+
+    async def test_rowid_aliases(self):
+        """Conditions on rowid, oid and _rowid_ work like in SQLite."""
+        queries = [("SELECT * FROM users WHERE rowid = 2", ()),
+                   ("SELECT * FROM users WHERE oid > ?", (5,)),
+                   ("SELECT * FROM users WHERE _rowid_ <= 3", ()),
+                   ("SELECT * FROM users WHERE age > 40", ())]
+        results = await asyncio.gather(*(self.batcher.fetch(query, params) for query, params in queries))
+        for (query, params), rows in zip(queries, results):
+            with self.subTest(query=query):
+                self.assertEqual(sorted(rows, key=repr), self.direct(query, params))
+
+    async def test_unknown_column(self):
+        """An unknown column raises the same error as the direct query."""
+        results = await asyncio.gather(
+            self.batcher.fetch("SELECT * FROM users"),
+            self.batcher.fetch("SELECT * FROM users WHERE missing = 1"),
+            return_exceptions=True,
+        )
+        self.assertEqual(len(results[0]), len(ROWS))
+        self.assertIsInstance(results[1], sqlite3.OperationalError)
+        self.assertIn("no such column", str(results[1]))
+
+    async def test_cancelled_caller(self):
+        """Cancelling one grouped caller does not affect the others."""
+        cancelled = asyncio.ensure_future(self.batcher.fetch("SELECT * FROM users"))
+        kept = asyncio.ensure_future(self.batcher.fetch("SELECT * FROM users WHERE age > 40"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        rows = await kept
+        self.assertEqual(sorted(rows, key=repr), self.direct("SELECT * FROM users WHERE age > 40", ()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,15 +3,51 @@
 Advanced Python: Using Decorators and Context Managers
 -------------------------------------------------------
 Task: Create a decorator that logs SQL queries executed by any function.
-Includes timestamped logs and safe resource handling using context managers.
+Each call is timed (wall and CPU), summarised as a structured record and
+emitted through `logging` behind a non-blocking queue, with optional sampling
+so the decorator can stay enabled in production: the calling thread only
+enqueues a small tuple, and the LogRecord (and params hash) is built on the
+listener thread. Every call also
+feeds a per-fingerprint latency histogram that can be exported as JSON or
+in the Prometheus text format.
 """
 
+import re
+import json
+import time
+import queue
+import atexit
+import random
+import hashlib
+import inspect
+import logging
+import logging.handlers
 import sqlite3
 import functools
-from datetime import datetime
+import threading
 from contextlib import contextmanager
 
 
+query_logger = logging.getLogger("queries")
+_listener = None
+# Queue read by the listener; log_queries puts raw call data on it directly
+_log_queue = None
+_QUERY_MESSAGE = (
+    "query %(function)s %(status)s in %(wall_ms).3f ms "
+    "(cpu %(cpu_ms).3f ms, rows %(rows)d): %(fingerprint)s"
+)
+
+# Global registry of latency histograms keyed by query fingerprint
+query_stats = {}
+_stats_lock = threading.Lock()
+
+# Literals and whitespace removed when computing a query fingerprint
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
 # Context Manager for handling DB connections
 @contextmanager
 def db_connection(db_name='users.db'):
@@ -23,24 +59,297 @@ def db_connection(db_name='users.db'):
         conn.close()
 
 
-# Decorator to log SQL queries before executing the function
-def log_queries(func):
-    """Decorator that logs SQL queries executed by a function with timestamps."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        # Retrieve query argument (positional or keyword)
-        query = kwargs.get('query') if 'query' in kwargs else args[0] if args else None
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def configure_query_logging(handler=None, level=logging.INFO):
+    """
+    Route the query logger through a QueueHandler so callers never block on I/O.
+    The real handler (stderr by default) runs on a QueueListener thread, which
+    also turns the raw call data queued by log_queries into LogRecords.
+    :param handler: Handler that finally writes the records
+    :param level: Level of the query logger
+    :return: The running QueueListener
+    """
+    global _listener, _log_queue
+    if _listener is not None:
+        _listener.stop()
+        for old in list(query_logger.handlers):
+            query_logger.removeHandler(old)
+
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(asctime)s] [%(levelname)s] %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    query_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    query_logger.setLevel(level)
+    query_logger.propagate = False
+
+    _listener = _QueryListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    _log_queue = log_queue
+    return _listener
+
+
+class _QueryListener(logging.handlers.QueueListener):
+    """QueueListener that also accepts the raw call tuples queued by log_queries."""
+
+    def handle(self, record):
+        if isinstance(record, tuple):
+            record = _query_record(*record)
+            if not query_logger.filter(record):
+                return
+        super().handle(record)
+
+
+def _query_record(created, thread, thread_name, stats):
+    """Build the LogRecord of a logged call from its queued data."""
+    stats["params_hash"] = hash_params(stats.pop("params"))
+    record = query_logger.makeRecord(
+        query_logger.name, logging.INFO, __file__, 0, _QUERY_MESSAGE, (stats,), None,
+        extra={"query_stats": stats},
+    )
+    # Stamp the record with the calling thread and time, not the listener's
+    record.created = created
+    record.msecs = (created - int(created)) * 1000
+    record.relativeCreated = (created - logging._startTime) * 1000
+    record.thread = thread
+    record.threadName = thread_name
+    return record
+
+
+@atexit.register
+def _stop_listener():
+    """Flush pending query records when the interpreter exits."""
+    global _log_queue
+    if _listener is not None:
+        _log_queue = None
+        _listener.stop()
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in microseconds.
+    Values are bucketed log-linearly: exact below 2**SUB_BUCKET_BITS and with a
+    relative error under 1 / 2**(SUB_BUCKET_BITS - 1) above it, so memory stays
+    small while percentiles remain accurate across many orders of magnitude.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us = None
+        self.max_us = 0
+        self.functions = set()
+
+    def record(self, value_us):
+        """Add one observation (in microseconds) to the histogram."""
+        value_us = max(int(value_us), 0)
+        exponent = max(value_us.bit_length() - self.SUB_BUCKET_BITS, 0)
+        key = (exponent << self.SUB_BUCKET_BITS) | (value_us >> exponent)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        self.count += 1
+        self.total_us += value_us
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = value_us if self.min_us is None else min(self.min_us, value_us)
+
+    def _bucket_value(self, key):
+        """Midpoint of the value range covered by a bucket key."""
+        exponent = key >> self.SUB_BUCKET_BITS
+        mantissa = key & ((1 << self.SUB_BUCKET_BITS) - 1)
+        low = mantissa << exponent
+        return low + ((1 << exponent) - 1) / 2
+
+    def percentile(self, percent):
+        """Return the value (in microseconds) at the given percentile."""
+        if not self.count:
+            return 0.0
+        target = max(1, -(-self.count * percent // 100))
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= target:
+                return min(self._bucket_value(key), self.max_us)
+        return float(self.max_us)
+
+    def summary(self):
+        """Return count, total and p50/p95/p99 in milliseconds."""
+        return {
+            "count": self.count,
+            "total_ms": self.total_us / 1000,
+            "min_ms": (self.min_us or 0) / 1000,
+            "max_ms": self.max_us / 1000,
+            "p50_ms": self.percentile(50) / 1000,
+            "p95_ms": self.percentile(95) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+        }
+
 
-        if query:
-            print(f"[{timestamp}] [LOG] Executing SQL Query: {query}")
-        else:
-            print(f"[{timestamp}] [LOG] No SQL query provided.")
+def record_query_timing(fingerprint, function, wall_ms):
+    """Add a timing to the histogram of the given query fingerprint."""
+    with _stats_lock:
+        histogram = query_stats.get(fingerprint)
+        if histogram is None:
+            histogram = query_stats[fingerprint] = LatencyHistogram()
+        histogram.record(wall_ms * 1000)
+        histogram.functions.add(function)
 
-        result = func(*args, **kwargs)
-        print(f"[{timestamp}] [LOG] Query execution completed.\n")
-        return result
-    return wrapper
+
+def reset_query_stats():
+    """Drop all recorded histograms."""
+    with _stats_lock:
+        query_stats.clear()
+
+
+def _escape_label(value):
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def report_query_stats(fmt="json"):
+    """
+    Export per-fingerprint latency statistics, heaviest total time first.
+    :param fmt: "json" or "prometheus" (text exposition format)
+    :return: The report as a string
+    """
+    with _stats_lock:
+        rows = [
+            dict(fingerprint=fingerprint, functions=sorted(histogram.functions), **histogram.summary())
+            for fingerprint, histogram in query_stats.items()
+        ]
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+
+    if fmt == "json":
+        return json.dumps(rows, indent=2)
+    if fmt != "prometheus":
+        raise ValueError(f"Unsupported report format: {fmt}")
+
+    lines = [
+        "# HELP sql_query_duration_seconds Latency of SQL queries by fingerprint.",
+        "# TYPE sql_query_duration_seconds summary",
+    ]
+    for row in rows:
+        labels = f'fingerprint="{_escape_label(row["fingerprint"])}"'
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'sql_query_duration_seconds{{{labels},quantile="{quantile}"}} {row[key] / 1000:.6f}')
+        lines.append(f"sql_query_duration_seconds_sum{{{labels}}} {row['total_ms'] / 1000:.6f}")
+        lines.append(f"sql_query_duration_seconds_count{{{labels}}} {row['count']}")
+    return "\n".join(lines) + "\n"
+
+
+@functools.lru_cache(maxsize=1024)
+def fingerprint_query(query):
+    """Normalize a SQL statement so queries differing only in literals group together."""
+    fingerprint = _STRING_LITERAL.sub("?", query)
+    fingerprint = _NUMBER_LITERAL.sub("?", fingerprint)
+    fingerprint = _WHITESPACE.sub(" ", fingerprint).strip().rstrip(";").lower()
+    return _IN_LIST.sub("in (?+)", fingerprint)
+
+
+def hash_params(params):
+    """Return a short, stable digest of query parameters without logging their values."""
+    if params is None:
+        return None
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+
+def _row_count(result):
+    """Best-effort row count for the value returned by a query function."""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple)) and (not result or isinstance(result[0], (tuple, sqlite3.Row))):
+        return len(result)
+    return 1
+
+
+def _extract_query(args, kwargs):
+    """Retrieve the query and its parameters (positional or keyword)."""
+    query = kwargs.get('query') if 'query' in kwargs else args[0] if args else None
+    params = kwargs.get('params') if 'params' in kwargs else args[1] if len(args) > 1 else None
+    return (query, params) if isinstance(query, str) else (None, None)
+
+
+# Decorator to log SQL queries executed by the function
+def log_queries(func=None, *, sample_rate=1.0, query=None, logger=query_logger):
+    """
+    Decorator that records structured timing data for the SQL a function executes.
+    Usable bare (@log_queries) or configured (@log_queries(sample_rate=0.01)).
+    Every call is timed into the fingerprint histograms; sampling only limits
+    the detailed (CPU time, params hash) log records. Records for the default
+    logger are handed to its listener as raw data once configure_query_logging
+    has run; other loggers get them through logger.info. CPU time is that of the
+    calling thread, so other threads' work is not counted. Coroutine functions
+    are awaited; their CPU time covers the whole process while the call was pending.
+    :param sample_rate: Fraction of calls that are logged (0.0 - 1.0)
+    :param query: Static SQL for functions that do not receive it as an argument
+    :param logger: Logger receiving the records (defaults to the "queries" logger)
+    """
+    def decorator(fn):
+        def start(args, kwargs, cpu_clock):
+            """Capture the query and the start clocks of a call (CPU only when it is logged)."""
+            sql, params = (query, None) if query else _extract_query(args, kwargs)
+            fingerprint = fingerprint_query(sql) if sql else fn.__qualname__
+            sampled = sample_rate >= 1.0 or random.random() < sample_rate
+            if not sampled or not logger.isEnabledFor(logging.INFO):
+                return sql, params, fingerprint, time.perf_counter(), None, None
+            return sql, params, fingerprint, time.perf_counter(), cpu_clock, cpu_clock()
+
+        def finish(call, result, status):
+            """Record the call into its histogram and log it when sampled."""
+            sql, params, fingerprint, start_wall, cpu_clock, start_cpu = call
+            wall_ms = (time.perf_counter() - start_wall) * 1000
+            record_query_timing(fingerprint, fn.__qualname__, wall_ms)
+            if cpu_clock is None:
+                return
+            cpu_ms = (cpu_clock() - start_cpu) * 1000
+            stats = {
+                "function": fn.__qualname__,
+                "query": sql,
+                "fingerprint": fingerprint,
+                "wall_ms": wall_ms,
+                "cpu_ms": cpu_ms,
+                "rows": _row_count(result),
+                "status": status,
+            }
+            log_queue = _log_queue
+            if logger is query_logger and log_queue is not None:
+                # Hashed later on the listener thread: snapshot mutable params
+                stats["params"] = params.copy() if isinstance(params, (list, dict)) else params
+                thread = threading.current_thread()
+                log_queue.put((time.time(), thread.ident, thread.name, stats))
+                return
+            stats["params_hash"] = hash_params(params)
+            logger.info(_QUERY_MESSAGE, stats, extra={"query_stats": stats})
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                call = start(args, kwargs, time.process_time)
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception:
+                    finish(call, None, "error")
+                    raise
+                finish(call, result, "ok")
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            call = start(args, kwargs, time.thread_time)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                finish(call, None, "error")
+                raise
+            finish(call, result, "ok")
+            return result
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @log_queries
@@ -54,9 +363,13 @@ def fetch_all_users(query):
 
 
 if __name__ == "__main__":
+    configure_query_logging()
+
     # Example usage
     try:
         users = fetch_all_users(query="SELECT * FROM users;")
         print("Fetched Users:", users)
     except sqlite3.Error as e:
         print(f"[ERROR] Database error: {e}")
+
+    print(report_query_stats())
@@ -3,35 +3,205 @@
 Advanced Python: Decorator for Automatic Database Connection Handling
 ----------------------------------------------------------------------
 Task: Create a decorator that opens and closes the database connection automatically.
+Connections can also be reused per thread so their prepared statement cache
+survives across calls, with hit statistics and a batched executemany helper.
 """
 
 import sqlite3
+import inspect
+import itertools
 import functools
+import threading
+from collections import OrderedDict
 from datetime import datetime
 
+try:
+    import aiosqlite
+except ImportError:  # async support is optional
+    aiosqlite = None
 
-def with_db_connection(func):
-    """Decorator that handles opening and closing the database connection automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [LOG] Opening database connection...")
-
-        conn = sqlite3.connect("users.db")
-        try:
-            # Pass the connection object to the wrapped function
-            result = func(conn, *args, **kwargs)
-            print(f"[{timestamp}] [LOG] Closing database connection successfully.")
-            return result
-        except sqlite3.Error as e:
-            print(f"[{timestamp}] [ERROR] Database error: {e}")
-        finally:
-            conn.close()
-            print(f"[{timestamp}] [LOG] Database connection closed.")
-    return wrapper
-
-
-@with_db_connection
+# Per-thread connections kept open by with_db_connection(reuse=True)
+_local = threading.local()
+
+
+class StatementCacheCursor(sqlite3.Cursor):
+    """Cursor that reports executed SQL to its connection's statement cache stats."""
+
+    def execute(self, sql, parameters=()):
+        self.connection.record_statement(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.record_statement(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class StatementCacheConnection(sqlite3.Connection):
+    """
+    sqlite3 connection exposing hit statistics of its prepared statement cache.
+    sqlite3 keeps the last `cached_statements` compiled statements per connection
+    in an LRU keyed by SQL text; this class mirrors that LRU to count how often a
+    statement was served from the cache instead of being parsed again.
+    """
+
+    def __init__(self, database, timeout=5.0, detect_types=0, isolation_level="",
+                 check_same_thread=True, factory=sqlite3.Connection, cached_statements=128,
+                 *args, **kwargs):
+        # Same positional order as sqlite3.connect, so cached_statements is seen
+        # however it was passed
+        super().__init__(database, timeout, detect_types, isolation_level,
+                         check_same_thread, factory, cached_statements, *args, **kwargs)
+        self.cached_statements = cached_statements
+        self.statement_hits = 0
+        self.statement_misses = 0
+        self._statements = OrderedDict()
+
+    def record_statement(self, sql):
+        """Account one execution of `sql` against the mirrored LRU."""
+        if sql in self._statements:
+            self._statements.move_to_end(sql)
+            self.statement_hits += 1
+            return
+        self.statement_misses += 1
+        self._statements[sql] = None
+        if len(self._statements) > self.cached_statements:
+            self._statements.popitem(last=False)
+
+    def cursor(self, factory=StatementCacheCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def cache_stats(self):
+        """Return the size, capacity, hits and misses of the statement cache."""
+        lookups = self.statement_hits + self.statement_misses
+        return {
+            "size": len(self._statements),
+            "cached_statements": self.cached_statements,
+            "hits": self.statement_hits,
+            "misses": self.statement_misses,
+            "hit_ratio": self.statement_hits / lookups if lookups else 0.0,
+        }
+
+
+def get_connection(db_name="users.db", cached_statements=128):
+    """
+    Return this thread's reusable connection to `db_name`, opening it on first use.
+    Connections are kept per statement cache size, so a caller asking for another
+    size gets its own connection.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    key = (db_name, cached_statements)
+    conn = connections.get(key)
+    if conn is None:
+        conn = connections[key] = sqlite3.connect(
+            db_name, cached_statements=cached_statements, factory=StatementCacheConnection,
+            uri=db_name.startswith("file:"),
+        )
+    return conn
+
+
+def close_connections():
+    """Close the reusable connections opened by the current thread."""
+    for conn in getattr(_local, "connections", {}).values():
+        conn.close()
+    _local.connections = {}
+
+
+def execute_batched(conn, sql, rows, batch_size=1000):
+    """
+    Run `sql` once per parameter tuple in `rows` through executemany, in chunks.
+    The statement is prepared once per chunk and `rows` may be any iterable, so
+    bulk updates never materialize more than `batch_size` tuples at a time.
+    :return: Total number of rows affected
+    """
+    affected = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, batch_size))
+        if not chunk:
+            return affected
+        affected += conn.executemany(sql, chunk).rowcount
+
+
+def with_db_connection(func=None, *, db_name="users.db", reuse=False, cached_statements=128):
+    """
+    Decorator that handles opening and closing the database connection automatically.
+    Usable bare (@with_db_connection) or configured (@with_db_connection(reuse=True)).
+    Coroutine functions receive an aiosqlite connection instead of a sqlite3 one.
+    :param db_name: Database file (or "file:" URI) to connect to
+    :param reuse: Keep one connection per thread open across calls, so its prepared
+                  statement cache survives; uncommitted work is rolled back after each call
+    :param cached_statements: Size of the connection's prepared statement cache
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            if aiosqlite is None:
+                raise RuntimeError("aiosqlite is required to decorate coroutine functions")
+            if reuse:
+                raise ValueError("reuse is only supported for synchronous functions")
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                print(f"[{timestamp}] [LOG] Opening database connection...")
+
+                conn = await aiosqlite.connect(
+                    db_name, cached_statements=cached_statements, uri=db_name.startswith("file:")
+                )
+                try:
+                    result = await fn(conn, *args, **kwargs)
+                    print(f"[{timestamp}] [LOG] Closing database connection successfully.")
+                    return result
+                except sqlite3.Error as e:
+                    print(f"[{timestamp}] [ERROR] Database error: {e}")
+                finally:
+                    await conn.close()
+                    print(f"[{timestamp}] [LOG] Database connection closed.")
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if reuse:
+                print(f"[{timestamp}] [LOG] Reusing database connection...")
+                conn = get_connection(db_name, cached_statements)
+            else:
+                print(f"[{timestamp}] [LOG] Opening database connection...")
+                conn = sqlite3.connect(
+                    db_name, cached_statements=cached_statements, factory=StatementCacheConnection,
+                    uri=db_name.startswith("file:"),
+                )
+            try:
+                # Pass the connection object to the wrapped function
+                result = fn(conn, *args, **kwargs)
+                if not reuse:
+                    print(f"[{timestamp}] [LOG] Closing database connection successfully.")
+                return result
+            except sqlite3.Error as e:
+                print(f"[{timestamp}] [ERROR] Database error: {e}")
+            finally:
+                if reuse:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    print(f"[{timestamp}] [LOG] Database connection released.")
+                else:
+                    conn.close()
+                    print(f"[{timestamp}] [LOG] Database connection closed.")
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+@with_db_connection(reuse=True)
 def get_user_by_id(conn, user_id):
     """Fetch a user by ID from the users table."""
     cursor = conn.cursor()
@@ -43,3 +213,8 @@ if __name__ == "__main__":
     # Fetch user by ID with automatic connection handling
     user = get_user_by_id(user_id=1)
     print("Fetched User:", user)
+
+    # Later lookups reuse the connection and its compiled statement
+    user = get_user_by_id(user_id=2)
+    print("Fetched User:", user)
+    print("Statement cache:", get_connection().cache_stats())
@@ -4,54 +4,194 @@ Advanced Python: Transaction Management Decorator
 -------------------------------------------------
 Task: Create a decorator that automatically commits or rolls back database transactions.
 Includes integration with the with_db_connection decorator.
+Nested transactional calls run inside SAVEPOINTs, bulk updates can commit every
+N statements, and the outermost transaction can take the write lock up front
+with BEGIN IMMEDIATE.
 """
 
-import sqlite3
+import re
+import inspect
+import itertools
 import functools
 from datetime import datetime
 
+with_db_connection = __import__('1-with_db_connection').with_db_connection
 
-def with_db_connection(func):
-    """Decorator that opens and closes the database connection automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [LOG] Opening database connection...")
-
-        conn = sqlite3.connect("users.db")
-        try:
-            result = func(conn, *args, **kwargs)
-            print(f"[{timestamp}] [LOG] Closing database connection successfully.")
-            return result
-        except sqlite3.Error as e:
-            print(f"[{timestamp}] [ERROR] Database error: {e}")
-        finally:
-            conn.close()
-            print(f"[{timestamp}] [LOG] Database connection closed.")
-    return wrapper
-
-
-def transactional(func):
-    """Decorator that manages database transactions (commit or rollback)."""
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [LOG] Starting transaction...")
-
-        try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()
-            print(f"[{timestamp}] [LOG] Transaction committed successfully.")
-            return result
-        except sqlite3.Error as e:
-            conn.rollback()
-            print(f"[{timestamp}] [ERROR] Transaction failed. Rolled back due to: {e}")
-        except Exception as e:
-            conn.rollback()
-            print(f"[{timestamp}] [ERROR] Unexpected error. Rolled back due to: {e}")
-        finally:
-            print(f"[{timestamp}] [LOG] Transaction finished.\n")
-    return wrapper
+# Unique savepoint names across nested transactional calls
+_savepoint_ids = itertools.count(1)
+_SAVEPOINT_CONTROL = re.compile(r"^\s*(SAVEPOINT|RELEASE|ROLLBACK(?:\s+TRANSACTION)?\s+TO)\b", re.IGNORECASE)
+
+
+class BatchingConnection:
+    """
+    Connection proxy that commits every `batch_size` executed statements.
+    Statements run through the connection or any of its cursors are counted
+    (an executemany call counts once); the transaction is reopened after each
+    intermediate commit so the rest of the work stays transactional.
+    SAVEPOINT control statements (e.g. from nested transactional calls) are not
+    counted, and no commit happens while a savepoint is open since it would
+    release it; a full batch is committed once the savepoint is released.
+    """
+
+    def __init__(self, conn, batch_size, begin="BEGIN"):
+        self._conn = conn
+        self._begin = begin
+        self.batch_size = batch_size
+        self.pending = 0
+        self.batches_committed = 0
+        # Pending count when each open savepoint was taken
+        self._savepoints = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def statement_executed(self, sql):
+        """Count one statement and commit the batch once it is full."""
+        control = _SAVEPOINT_CONTROL.match(sql)
+        if control is None:
+            self.pending += 1
+        else:
+            keyword = control.group(1).upper()
+            if keyword == "SAVEPOINT":
+                self._savepoints.append(self.pending)
+            elif keyword == "RELEASE":
+                if self._savepoints:
+                    self._savepoints.pop()
+            elif self._savepoints:
+                # ROLLBACK TO undoes the statements counted since the savepoint
+                self.pending = self._savepoints[-1]
+        if self.pending >= self.batch_size and not self._savepoints:
+            self._conn.commit()
+            self._conn.execute(self._begin)
+            self.batches_committed += 1
+            self.pending = 0
+
+    def execute(self, sql, parameters=()):
+        cursor = self._conn.execute(sql, parameters)
+        self.statement_executed(sql)
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        cursor = self._conn.executemany(sql, seq_of_parameters)
+        self.statement_executed(sql)
+        return cursor
+
+    def cursor(self, *args, **kwargs):
+        return _BatchingCursor(self._conn.cursor(*args, **kwargs), self)
+
+
+class _BatchingCursor:
+    """Cursor proxy reporting executed statements to its BatchingConnection."""
+
+    def __init__(self, cursor, batcher):
+        self._cursor = cursor
+        self._batcher = batcher
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, sql, parameters=()):
+        self._cursor.execute(sql, parameters)
+        self._batcher.statement_executed(sql)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._cursor.executemany(sql, seq_of_parameters)
+        self._batcher.statement_executed(sql)
+        return self
+
+
+def transactional(func=None, *, immediate=False, batch_size=None):
+    """
+    Decorator that manages database transactions (commit or rollback).
+    Usable bare (@transactional) or configured (@transactional(immediate=True)).
+    When the connection is already inside a transaction the call runs in a
+    SAVEPOINT instead, so transactional functions compose: a failing inner call
+    only undoes its own work. Errors are re-raised after the rollback.
+    Coroutine functions are awaited and committed through their aiosqlite connection.
+    :param immediate: Start the outermost transaction with BEGIN IMMEDIATE, taking
+                      the write lock up front instead of upgrading it mid-transaction
+    :param batch_size: Commit every N statements (synchronous, outermost calls only);
+                       a failure then rolls back only the uncommitted batch
+    """
+    begin = "BEGIN IMMEDIATE" if immediate else "BEGIN"
+
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            if batch_size:
+                raise ValueError("batch_size is only supported for synchronous functions")
+
+            @functools.wraps(fn)
+            async def async_wrapper(conn, *args, **kwargs):
+                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                if conn.in_transaction:
+                    savepoint = f"sp_{next(_savepoint_ids)}"
+                    print(f"[{timestamp}] [LOG] Starting nested transaction {savepoint}...")
+                    await conn.execute(f"SAVEPOINT {savepoint}")
+                    try:
+                        result = await fn(conn, *args, **kwargs)
+                    except Exception as e:
+                        await conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                        await conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                        print(f"[{timestamp}] [ERROR] Nested transaction {savepoint} rolled back due to: {e}")
+                        raise
+                    await conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                    return result
+
+                print(f"[{timestamp}] [LOG] Starting transaction...")
+                await conn.execute(begin)
+                try:
+                    result = await fn(conn, *args, **kwargs)
+                    await conn.commit()
+                    print(f"[{timestamp}] [LOG] Transaction committed successfully.")
+                    return result
+                except Exception as e:
+                    await conn.rollback()
+                    print(f"[{timestamp}] [ERROR] Transaction failed. Rolled back due to: {e}")
+                    raise
+                finally:
+                    print(f"[{timestamp}] [LOG] Transaction finished.\n")
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(conn, *args, **kwargs):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if conn.in_transaction:
+                savepoint = f"sp_{next(_savepoint_ids)}"
+                print(f"[{timestamp}] [LOG] Starting nested transaction {savepoint}...")
+                conn.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    result = fn(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+                    conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                    print(f"[{timestamp}] [ERROR] Nested transaction {savepoint} rolled back due to: {e}")
+                    raise
+                conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+                return result
+
+            print(f"[{timestamp}] [LOG] Starting transaction...")
+            conn.execute(begin)
+            target = BatchingConnection(conn, batch_size, begin) if batch_size else conn
+            try:
+                result = fn(target, *args, **kwargs)
+                conn.commit()
+                print(f"[{timestamp}] [LOG] Transaction committed successfully.")
+                return result
+            except Exception as e:
+                conn.rollback()
+                print(f"[{timestamp}] [ERROR] Transaction failed. Rolled back due to: {e}")
+                raise
+            finally:
+                print(f"[{timestamp}] [LOG] Transaction finished.\n")
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @with_db_connection
@@ -63,6 +203,16 @@ def update_user_email(conn, user_id, new_email):
     print(f"[LOG] Email updated for user ID {user_id}.")
 
 
+@with_db_connection
+@transactional(immediate=True, batch_size=500)
+def update_user_emails(conn, updates):
+    """Update many users' emails, committing every 500 statements."""
+    cursor = conn.cursor()
+    for user_id, new_email in updates:
+        cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+    print(f"[LOG] Emails updated for {len(updates)} users.")
+
+
 if __name__ == "__main__":
     # Update user's email with automatic transaction handling
-    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
\ No newline at end of file
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
@@ -3,61 +3,136 @@
 Advanced Python: Retry Database Operations Decorator
 ----------------------------------------------------
 Task: Implement a decorator that retries database operations on transient failure.
+Retries use exponential backoff with full jitter, stop at an optional deadline,
+only apply to contention errors (e.g. "database is locked") and draw from a
+process-wide retry budget so they cannot amplify an outage.
 """
 
 import time
+import random
+import asyncio
 import sqlite3
+import inspect
 import functools
+import threading
 from datetime import datetime
 
+with_db_connection = __import__('1-with_db_connection').with_db_connection
 
-def with_db_connection(func):
-    """Decorator that handles opening and closing the database connection automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [LOG] Opening database connection...")
-
-        conn = sqlite3.connect("users.db")
-        try:
-            result = func(conn, *args, **kwargs)
-            print(f"[{timestamp}] [LOG] Closing database connection successfully.")
-            return result
-        except sqlite3.Error as e:
-            print(f"[{timestamp}] [ERROR] Database error: {e}")
-        finally:
-            conn.close()
-            print(f"[{timestamp}] [LOG] Database connection closed.")
-    return wrapper
-
-
-def retry_on_failure(retries=3, delay=2):
+
+# Fragments of sqlite3.OperationalError messages caused by contention, not by the query
+TRANSIENT_ERRORS = (
+    "database is locked",
+    "database table is locked",
+    "database schema has changed",
+    "disk i/o error",
+)
+
+
+class RetryBudget:
+    """
+    Process-wide token bucket limiting retries to a fraction of all calls.
+    Every call deposits `ratio` tokens (capped at `capacity`) and every retry
+    withdraws one, so during an outage retries stop once the budget is spent
+    instead of multiplying the load on the database.
+    """
+
+    def __init__(self, ratio=0.1, capacity=10):
+        self.ratio = ratio
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Credit the budget for one call."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self):
+        """Spend one retry; return False when the budget is exhausted."""
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+# Budget shared by every retry_on_failure decorated function in the process
+retry_budget = RetryBudget()
+
+
+def is_transient(error):
+    """Return True if a database error is worth retrying."""
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and any(text in message for text in TRANSIENT_ERRORS)
+
+
+def backoff_delay(attempt, delay, max_delay):
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, delay * 2**attempt)]."""
+    return random.uniform(0, min(max_delay, delay * 2 ** attempt))
+
+
+def retry_on_failure(retries=3, delay=2, max_delay=30, deadline=None, budget=retry_budget):
     """
     Decorator factory that retries a function if it raises a transient database error.
-    :param retries: Number of retry attempts (default 3)
-    :param delay: Delay in seconds between retries (default 2)
+    Coroutine functions back off with asyncio.sleep so the event loop keeps running.
+    :param retries: Number of attempts (default 3)
+    :param delay: Base delay in seconds of the exponential backoff (default 2)
+    :param max_delay: Upper bound in seconds of a single backoff (default 30)
+    :param deadline: Maximum seconds spent across all attempts (default unbounded)
+    :param budget: RetryBudget shared between decorated functions (None disables it)
     """
+    def next_pause(error, attempt, started):
+        """Return the backoff before the next attempt, or None if the error must propagate."""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not is_transient(error):
+            print(f"[{timestamp}] [ERROR] Non-transient error encountered: {error}")
+            return None
+        print(f"[{timestamp}] [WARNING] Transient error on attempt {attempt + 1} of {retries}: {error}")
+        if attempt + 1 >= retries:
+            print(f"[{timestamp}] [ERROR] All {retries} attempts failed.")
+            return None
+
+        pause = backoff_delay(attempt, delay, max_delay)
+        if deadline is not None and time.monotonic() - started + pause > deadline:
+            print(f"[{timestamp}] [ERROR] Retry deadline of {deadline} seconds exceeded.")
+            return None
+        if budget is not None and not budget.withdraw():
+            print(f"[{timestamp}] [ERROR] Retry budget exhausted, not retrying.")
+            return None
+        print(f"[{timestamp}] [LOG] Retrying in {pause:.2f} seconds...\n")
+        return pause
+
     def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.monotonic()
+                if budget is not None:
+                    budget.deposit()
+                for attempt in range(retries):
+                    try:
+                        return await func(*args, **kwargs)
+                    except Exception as e:
+                        pause = next_pause(e, attempt, started)
+                        if pause is None:
+                            raise
+                    await asyncio.sleep(pause)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            attempts = 0
-            while attempts < retries:
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            started = time.monotonic()
+            if budget is not None:
+                budget.deposit()
+            for attempt in range(retries):
                 try:
-                    print(f"[{timestamp}] [LOG] Attempt {attempts + 1} of {retries}...")
                     return func(*args, **kwargs)
-                except sqlite3.OperationalError as e:
-                    attempts += 1
-                    print(f"[{timestamp}] [WARNING] Transient error: {e}")
-                    if attempts < retries:
-                        print(f"[{timestamp}] [LOG] Retrying in {delay} seconds...\n")
-                        time.sleep(delay)
-                    else:
-                        print(f"[{timestamp}] [ERROR] All {retries} attempts failed.")
-                        raise
                 except Exception as e:
-                    print(f"[{timestamp}] [ERROR] Non-transient error encountered: {e}")
-                    raise
+                    pause = next_pause(e, attempt, started)
+                    if pause is None:
+                        raise
+                time.sleep(pause)
         return wrapper
     return decorator
 
@@ -5,38 +5,78 @@ Advanced Python: Cache Database Query Results
 Task: Implement a decorator that caches the results of database queries to avoid redundant calls.
 """
 
-import time
-import sqlite3
+import asyncio
+import inspect
 import functools
 from datetime import datetime
 
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
 
 # Global dictionary to store cached query results
 query_cache = {}
 
+# Futures of queries currently being executed by a coroutine, keyed by query
+_inflight_queries = {}
 
-def with_db_connection(func):
-    """Decorator that handles opening and closing the database connection automatically."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] [LOG] Opening database connection...")
-
-        conn = sqlite3.connect("users.db")
-        try:
-            result = func(conn, *args, **kwargs)
-            print(f"[{timestamp}] [LOG] Closing database connection successfully.")
-            return result
-        except sqlite3.Error as e:
-            print(f"[{timestamp}] [ERROR] Database error: {e}")
-        finally:
-            conn.close()
-            print(f"[{timestamp}] [LOG] Database connection closed.")
-    return wrapper
+
+class _LeaderCancelled(Exception):
+    """Set on an in-flight query whose executing call was cancelled."""
 
 
 def cache_query(func):
-    """Decorator that caches database query results based on the SQL query string."""
+    """
+    Decorator that caches database query results based on the SQL query string.
+    For coroutine functions concurrent misses on the same query are collapsed
+    (single-flight): one call executes it and the others await its result.
+    If the executing call is cancelled, one of the waiting calls takes over
+    the query instead of being cancelled too.
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(conn, *args, **kwargs):
+            query = kwargs.get('query') if 'query' in kwargs else args[0] if args else None
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            if not query:
+                print(f"[{timestamp}] [LOG] No SQL query provided.")
+                return await func(conn, *args, **kwargs)
+
+            while True:
+                if query in query_cache:
+                    print(f"[{timestamp}] [CACHE HIT] Returning cached result for query: {query}")
+                    return query_cache[query]
+
+                pending = _inflight_queries.get(query)
+                if pending is None:
+                    break
+                print(f"[{timestamp}] [CACHE WAIT] Awaiting in-flight result for query: {query}")
+                try:
+                    return await asyncio.shield(pending)
+                except _LeaderCancelled:
+                    # The executing call was cancelled: take over (or wait for whoever did)
+                    continue
+
+            print(f"[{timestamp}] [CACHE MISS] Executing and caching result for query: {query}")
+            pending = _inflight_queries[query] = asyncio.get_running_loop().create_future()
+            # Mark the outcome as retrieved even if no other caller is waiting on it
+            pending.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+            try:
+                result = await func(conn, *args, **kwargs)
+            except asyncio.CancelledError:
+                pending.set_exception(_LeaderCancelled(query))
+                raise
+            except Exception as e:
+                pending.set_exception(e)
+                raise
+            else:
+                query_cache[query] = result
+                pending.set_result(result)
+                return result
+            finally:
+                del _inflight_queries[query]
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(conn, *args, **kwargs):
         query = kwargs.get('query') if 'query' in kwargs else args[0] if args else None
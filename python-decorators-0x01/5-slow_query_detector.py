@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Advanced Python: Slow Query Detection Decorator
+-----------------------------------------------
+Task: Create a decorator that flags SQL statements slower than a threshold and
+captures their `EXPLAIN QUERY PLAN` from the same SQLite connection, logging it
+with the timing and call site so missing indexes can be found from the logs.
+"""
+
+import sys
+import time
+import sqlite3
+import logging
+import functools
+
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+log_queries_module = __import__('0-log_queries')
+
+# Statements that have no meaningful query plan
+_UNEXPLAINABLE = ("begin", "commit", "end", "rollback", "savepoint", "release", "pragma")
+
+# Trace callbacks installed by active detectors, by id() of their connection
+# (sqlite3 has no getter for the current callback, and connections cannot be
+# weakly referenced; entries only live while a wrapped call runs)
+_active_traces = {}
+
+
+def _call_site():
+    """Return "file:line in function" for the first caller outside the decorator stack."""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_name in ("wrapper", "async_wrapper"):
+        frame = frame.f_back
+    if frame is None:
+        return None
+    return f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+
+
+def explain_query_plan(conn, statement):
+    """Return the `EXPLAIN QUERY PLAN` detail lines of a statement (expanded SQL)."""
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()
+    return [row[-1] for row in rows]
+
+
+def detect_slow_queries(threshold_ms=100, logger=log_queries_module.query_logger):
+    """
+    Decorator factory that reports statements slower than a threshold.
+    The wrapped function must receive the SQLite connection as its first argument
+    (e.g. placed under @with_db_connection). Statements are captured with the
+    connection's trace callback; each one is timed until the next statement (or
+    the end of the call) and explained only when it crosses the threshold.
+    The traced SQL has bound values inlined, so only its fingerprint is logged.
+    A callback set by an enclosing detector keeps receiving statements and is
+    restored afterwards; callbacks set by other code cannot be read back from
+    sqlite3 and are cleared.
+    :param threshold_ms: Duration in milliseconds above which a statement is slow
+    :param logger: Logger receiving the slow query records
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            statements = []
+            previous = _active_traces.get(id(conn))
+
+            def trace(sql):
+                statements.append((time.perf_counter(), sql))
+                if previous is not None:
+                    previous(sql)
+
+            _active_traces[id(conn)] = trace
+            conn.set_trace_callback(trace)
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                finished = time.perf_counter()
+                conn.set_trace_callback(previous)
+                if previous is None:
+                    del _active_traces[id(conn)]
+                else:
+                    _active_traces[id(conn)] = previous
+                ends = [started for started, _ in statements[1:]] + [finished]
+                for (started, sql), ended in zip(statements, ends):
+                    elapsed_ms = (ended - started) * 1000
+                    if elapsed_ms >= threshold_ms and not sql.lstrip().lower().startswith(_UNEXPLAINABLE):
+                        _report(conn, logger, func, sql, elapsed_ms, threshold_ms)
+        return wrapper
+    return decorator
+
+
+def _report(conn, logger, func, sql, elapsed_ms, threshold_ms):
+    """Capture the query plan of a slow statement and log it, without its bound values."""
+    try:
+        plan = explain_query_plan(conn, sql)
+    except sqlite3.Error as e:
+        plan = [f"EXPLAIN failed: {e}"]
+
+    record = {
+        "function": func.__qualname__,
+        "fingerprint": log_queries_module.fingerprint_query(sql),
+        "elapsed_ms": elapsed_ms,
+        "threshold_ms": threshold_ms,
+        "call_site": _call_site(),
+        "plan": plan,
+        "full_scan": any(line.startswith("SCAN") and "INDEX" not in line for line in plan),
+    }
+    logger.warning(
+        "slow query %(function)s took %(elapsed_ms).3f ms (threshold %(threshold_ms)s ms) "
+        "at %(call_site)s: %(fingerprint)s | plan: %(plan)s",
+        record, extra={"slow_query": record},
+    )
+
+
+@with_db_connection
+@detect_slow_queries(threshold_ms=1)
+def get_users_by_email_domain(conn, domain):
+    """Fetch users whose email belongs to a domain (no index can serve this)."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE email LIKE ?", (f"%@{domain}",))
+    return cursor.fetchall()
+
+
+if __name__ == "__main__":
+    log_queries_module.configure_query_logging(level=logging.WARNING)
+    users = get_users_by_email_domain(domain="hotmail.com")
+    print("Fetched Users:", users)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Advanced Python: Batched User Lookups (DataLoader pattern)
+----------------------------------------------------------
+Task: Replace one `SELECT ... WHERE id = ?` per user with a loader that collects
+the ids requested within a window and resolves them with a single
+`WHERE id IN (...)` query, de-duplicating and caching them per request scope.
+A synchronous loader resolves pending ids when the first result is needed; an
+asyncio loader resolves the ids requested within the same event loop tick.
+"""
+
+import asyncio
+
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+# SQLite's default limit on bound parameters per statement is 999
+MAX_BATCH_SIZE = 500
+USERS_BY_IDS = "SELECT * FROM users WHERE id IN ({})"
+
+
+def _batches(ids, size):
+    """Split a list of ids into chunks small enough for one IN (...) query."""
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _index_rows(rows):
+    """Map fetched rows by user id (the first column of the users table)."""
+    return {row[0]: row for row in rows}
+
+
+class PendingUser:
+    """Handle for a user requested from a UserLoader, resolved on first access."""
+
+    def __init__(self, loader, user_id):
+        self._loader = loader
+        self.user_id = user_id
+
+    def get(self):
+        """Return the user row (or None), dispatching the loader's pending batch if needed."""
+        if self.user_id not in self._loader.cache:
+            self._loader.dispatch()
+        return self._loader.cache[self.user_id]
+
+
+class UserLoader:
+    """
+    Synchronous batching loader for users, meant to live for one request.
+    `load` only queues the id; all queued ids are fetched together when the
+    first PendingUser is read, or when `dispatch`/`load_many` is called.
+    """
+
+    def __init__(self, conn, max_batch_size=MAX_BATCH_SIZE):
+        self.conn = conn
+        self.max_batch_size = max_batch_size
+        self.cache = {}
+        self.queries = 0
+        self._pending = {}
+
+    def load(self, user_id):
+        """Queue a user id and return a PendingUser for it."""
+        if user_id not in self.cache:
+            self._pending[user_id] = None
+        return PendingUser(self, user_id)
+
+    def load_many(self, user_ids):
+        """Return the rows (or None) of several users, fetched in as few queries as possible."""
+        handles = [self.load(user_id) for user_id in user_ids]
+        self.dispatch()
+        return [handle.get() for handle in handles]
+
+    def dispatch(self):
+        """Fetch every queued id not already cached."""
+        ids, self._pending = list(self._pending), {}
+        for batch in _batches(ids, self.max_batch_size):
+            cursor = self.conn.execute(USERS_BY_IDS.format(", ".join("?" * len(batch))), batch)
+            found = _index_rows(cursor.fetchall())
+            self.queries += 1
+            for user_id in batch:
+                self.cache[user_id] = found.get(user_id)
+
+    def clear(self):
+        """Forget cached users, e.g. after they were updated."""
+        self.cache.clear()
+
+
+class AsyncUserLoader:
+    """
+    Asyncio batching loader for users over an aiosqlite connection.
+    Ids passed to `load` during the same loop iteration (or within `window`
+    seconds) are fetched by one query; concurrent loads of the same id share
+    a single future, which is also the per-scope cache. Callers get a shielded
+    view of it, so cancelling one caller does not cancel the others' load.
+    """
+
+    def __init__(self, conn, max_batch_size=MAX_BATCH_SIZE, window=0.0):
+        self.conn = conn
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.cache = {}
+        self.queries = 0
+        self._pending = []
+        self._scheduled = False
+        self._dispatches = set()
+
+    def load(self, user_id):
+        """Return an awaitable resolving to the user row (or None)."""
+        future = self.cache.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.cache[user_id] = loop.create_future()
+            self._pending.append(user_id)
+            if not self._scheduled:
+                self._scheduled = True
+                if self.window:
+                    loop.call_later(self.window, self._start_dispatch)
+                else:
+                    loop.call_soon(self._start_dispatch)
+        return asyncio.shield(future)
+
+    async def load_many(self, user_ids):
+        """Return the rows (or None) of several users."""
+        return await asyncio.gather(*(self.load(user_id) for user_id in user_ids))
+
+    def _start_dispatch(self):
+        """Hand the collected ids to a dispatch task."""
+        ids, self._pending, self._scheduled = self._pending, [], False
+        task = asyncio.ensure_future(self._dispatch(ids))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, ids):
+        """Resolve the futures of a collected set of ids."""
+        for batch in _batches(ids, self.max_batch_size):
+            try:
+                async with self.conn.execute(USERS_BY_IDS.format(", ".join("?" * len(batch))), batch) as cursor:
+                    found = _index_rows(await cursor.fetchall())
+                self.queries += 1
+            except Exception as e:
+                for user_id in batch:
+                    # Failed ids are not cached so a later load can retry them
+                    future = self.cache.pop(user_id)
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for user_id in batch:
+                future = self.cache[user_id]
+                if future.done():
+                    # Cancelled directly by someone holding it: retry on the next load
+                    self.cache.pop(user_id)
+                else:
+                    future.set_result(found.get(user_id))
+
+    def clear(self):
+        """Forget cached users, e.g. after they were updated."""
+        self.cache = {user_id: future for user_id, future in self.cache.items() if not future.done()}
+
+
+@with_db_connection(reuse=True)
+def get_users_by_ids(conn, user_ids):
+    """Fetch several users by ID with a single query."""
+    return UserLoader(conn).load_many(user_ids)
+
+
+if __name__ == "__main__":
+    users = get_users_by_ids(user_ids=[1, 2, 3, 2, 1])
+    print("Fetched Users:", users)
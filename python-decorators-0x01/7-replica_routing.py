@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Advanced Python: Read Replica Routing Decorators
+------------------------------------------------
+Task: Route read-only query functions to a pool of read replicas and writes to
+the primary database, next to the with_db_connection decorator.
+Every write bumps a version stamp (SQLite's `PRAGMA user_version`) on the
+primary, in the same transaction as the write; replicas carry the stamp they
+were copied at, so reads skip replicas lagging behind the latest write and
+fall back to the primary.
+"""
+
+import sqlite3
+import functools
+import itertools
+import threading
+from contextlib import closing
+from datetime import datetime
+
+transactional = __import__('2-transactional').transactional
+
+
+def read_version(conn):
+    """Return the version stamp stored in a database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+class ReplicaRouter:
+    """
+    Routes decorated functions to the primary or to read-only replicas.
+    For local testing replicas are copies of the primary database file opened
+    with `mode=ro`; `sync_replicas` refreshes them, standing in for replication.
+    """
+
+    def __init__(self, primary="users.db", replicas=(), max_lag=0):
+        """
+        :param primary: Path of the primary database
+        :param replicas: Paths of the replica databases
+        :param max_lag: Number of versions a replica may lag behind the last write
+        """
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self._next_replica = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+        self._lock = threading.Lock()
+        self.version = None
+
+    def _latest_version(self):
+        """Return the version of the last write, read from the primary on first use."""
+        if self.version is None:
+            with closing(sqlite3.connect(self.primary)) as conn:
+                self.version = read_version(conn)
+        return self.version
+
+    def _connect_replica(self, path):
+        """Open a replica read-only so it can never take writes by mistake."""
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def _replica_connection(self):
+        """Return (path, connection) of the next replica fresh enough to serve reads."""
+        with self._lock:
+            start = next(self._next_replica)
+            required = self._latest_version() - self.max_lag
+        for offset in range(len(self.replicas)):
+            path = self.replicas[(start + offset) % len(self.replicas)]
+            try:
+                conn = self._connect_replica(path)
+                if read_version(conn) >= required:
+                    return path, conn
+                conn.close()
+            except sqlite3.Error:
+                continue
+        return None, None
+
+    def read_only(self, func):
+        """Decorator running a function on a replica, or on the primary if all replicas lag."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            path, conn = self._replica_connection() if self.replicas else (None, None)
+            if conn is None:
+                print(f"[{timestamp}] [LOG] No replica up to date, reading from primary.")
+                path, conn = self.primary, sqlite3.connect(self.primary)
+            else:
+                print(f"[{timestamp}] [LOG] Routing read to replica {path}.")
+            try:
+                return func(conn, *args, **kwargs)
+            finally:
+                conn.close()
+        return wrapper
+
+    def write(self, func):
+        """
+        Decorator running a function on the primary in one transaction, committing
+        it together with the bumped version stamp.
+        The transaction is opened here (BEGIN IMMEDIATE, so the stamp read inside it
+        is the latest one), which makes a @transactional function run in a savepoint;
+        the function must not commit on its own. The router's version is raised
+        before the commit, so no read can be routed to a replica lacking the write.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{timestamp}] [LOG] Routing write to primary {self.primary}.")
+            conn = sqlite3.connect(self.primary)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                changes = conn.total_changes
+                try:
+                    result = func(conn, *args, **kwargs)
+                    if conn.total_changes != changes:
+                        version = read_version(conn) + 1
+                        conn.execute(f"PRAGMA user_version = {version}")
+                        with self._lock:
+                            # Raised before the commit: readers fall back to the primary
+                            # (at worst needlessly, if the commit then fails)
+                            self.version = max(self._latest_version(), version)
+                    conn.commit()
+                except BaseException:
+                    conn.rollback()
+                    raise
+                return result
+            finally:
+                conn.close()
+        return wrapper
+
+    def sync_replicas(self):
+        """Copy the primary (data and version stamp) onto every replica."""
+        with closing(sqlite3.connect(self.primary)) as source:
+            for path in self.replicas:
+                with closing(sqlite3.connect(path)) as target:
+                    source.backup(target)
+
+
+router = ReplicaRouter("users.db", replicas=["users_replica_1.db", "users_replica_2.db"])
+
+
+@router.read_only
+def fetch_all_users(conn):
+    """Fetch all users from a replica."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users")
+    return cursor.fetchall()
+
+
+@router.write
+@transactional
+def update_user_email(conn, user_id, new_email):
+    """Update user's email on the primary."""
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+if __name__ == "__main__":
+    router.sync_replicas()
+    print("Fetched Users:", fetch_all_users())
+
+    # Replicas now lag behind the write, so the next read goes to the primary
+    update_user_email(user_id=1, new_email='Crawford_Cartwright@hotmail.com')
+    print("Fetched Users:", fetch_all_users())
+
+    router.sync_replicas()
+    print("Fetched Users:", fetch_all_users())
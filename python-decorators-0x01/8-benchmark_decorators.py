@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Advanced Python: Decorator Overhead Benchmarks
+----------------------------------------------
+Task: Measure the per-call cost of each decorator in this package, and of the
+common stacks, around a point lookup on an in-memory SQLite database.
+Reports ns/call, slowdown relative to the undecorated call and bytes allocated
+per call; results can be saved and compared against a saved baseline, exiting
+non-zero on regressions so the suite can gate changes.
+
+Usage:
+    ./8-benchmark_decorators.py [--number N] [--save FILE] [--compare FILE]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import timeit
+import logging
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+
+log_queries_module = __import__('0-log_queries')
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+transactional = __import__('2-transactional').transactional
+retry_on_failure = __import__('3-retry_on_failure').retry_on_failure
+cache_query = __import__('4-cache_query').cache_query
+
+log_queries = log_queries_module.log_queries
+
+# Shared-cache in-memory database, kept alive by the anchor connection below
+BENCH_DB = "file:decorator_bench?mode=memory&cache=shared"
+POINT_QUERY = "SELECT * FROM users WHERE id = ?"
+
+
+def create_bench_db(rows=1000):
+    """Create and fill the in-memory users table; return the anchor connection."""
+    conn = sqlite3.connect(BENCH_DB, uri=True)
+    conn.execute("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT, email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?)",
+        ((i, f"user{i}", f"user{i}@example.com", 20 + i % 60) for i in range(1, rows + 1)),
+    )
+    conn.commit()
+    return conn
+
+
+def point_lookup(conn, query=POINT_QUERY):
+    """Undecorated function every benchmark case wraps."""
+    return conn.execute(query, (42,)).fetchone()
+
+
+def build_cases(anchor):
+    """Return {name: zero-argument callable} for each decorator and stack."""
+    connected = with_db_connection(db_name=BENCH_DB)
+    reused = with_db_connection(db_name=BENCH_DB, reuse=True)
+    retry = retry_on_failure(retries=3, delay=0.01)
+    return {
+        "baseline": lambda: point_lookup(anchor, query=POINT_QUERY),
+        "log_queries": _bind(log_queries(point_lookup), anchor),
+        "with_db_connection": _bind(connected(point_lookup)),
+        "with_db_connection(reuse)": _bind(reused(point_lookup)),
+        "transactional": _bind(transactional(point_lookup), anchor),
+        "retry_on_failure": _bind(retry(point_lookup), anchor),
+        "cache_query": _bind(cache_query(point_lookup), anchor),
+        "connection+transactional+retry+log": _bind(
+            connected(transactional(retry(log_queries(point_lookup))))
+        ),
+        "full stack(reuse)": _bind(
+            reused(transactional(retry(cache_query(log_queries(point_lookup)))))
+        ),
+    }
+
+
+def _bind(func, *args):
+    """Freeze the arguments of a benchmark call."""
+    return lambda: func(*args, query=POINT_QUERY)
+
+
+def measure(call, number, repeat=5, alloc_samples=200):
+    """Return (ns per call, bytes allocated per call) for a zero-argument callable."""
+    for _ in range(10):
+        call()
+    best = min(timeit.repeat(call, number=number, repeat=repeat))
+
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(alloc_samples):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        call()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return best / number * 1e9, allocated / alloc_samples
+
+
+def run(number):
+    """Run every case and return {name: {"ns_per_call", "relative", "alloc_bytes"}}."""
+    anchor = create_bench_db()
+    log_queries_module.configure_query_logging(handler=logging.NullHandler())
+    results = {}
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for name, call in build_cases(anchor).items():
+            ns_per_call, alloc_bytes = measure(call, number)
+            results[name] = {"ns_per_call": ns_per_call, "alloc_bytes": alloc_bytes}
+    baseline = results["baseline"]["ns_per_call"]
+    for result in results.values():
+        result["relative"] = result["ns_per_call"] / baseline
+    anchor.close()
+    return results
+
+
+def report(results):
+    """Print the results as a table."""
+    print(f"{'case':<38}{'ns/call':>12}{'x baseline':>12}{'B/call':>10}")
+    for name, result in results.items():
+        print(f"{name:<38}{result['ns_per_call']:>12.0f}{result['relative']:>12.2f}{result['alloc_bytes']:>10.0f}")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return the cases whose slowdown relative to the undecorated call grew by more
+    than `tolerance` versus a saved baseline. Ratios are compared instead of raw
+    timings so a baseline recorded on another machine stays meaningful.
+    """
+    regressions = []
+    for name, result in results.items():
+        saved = baseline.get(name)
+        if saved and result["relative"] > saved["relative"] * (1 + tolerance):
+            regressions.append(f"{name}: {saved['relative']:.2f}x -> {result['relative']:.2f}x")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000, help="calls per timing repeat")
+    parser.add_argument("--save", metavar="FILE", help="write results as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="fail if slower than a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (default 0.25)")
+    args = parser.parse_args()
+
+    results = run(args.number)
+    report(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        sys.exit(1 if regressions else 0)
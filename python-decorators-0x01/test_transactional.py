@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Unit tests for the savepoints and batching of 2-transactional.py"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing, redirect_stdout
+from io import StringIO
+
+transactional_module = __import__('2-transactional')
+BatchingConnection = transactional_module.BatchingConnection
+transactional = transactional_module.transactional
+
+
+class TestTransactional(unittest.TestCase):
+    """Unit tests for nested and batched transactional calls"""
+
+    def setUp(self):
+        """Create an empty users table and silence the decorator's logs"""
+        fd, self.db_name = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        self.addCleanup(os.remove, self.db_name)
+        with closing(sqlite3.connect(self.db_name)) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn = sqlite3.connect(self.db_name)
+        self.addCleanup(self.conn.close)
+        output = redirect_stdout(StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def committed(self):
+        """Return the ids visible to another connection"""
+        with closing(sqlite3.connect(self.db_name)) as other:
+            return [row[0] for row in other.execute("SELECT id FROM users ORDER BY id")]
+
+    def test_nested_rollback(self):
+        """Test that a failing nested call only undoes its own work"""
+        @transactional
+        def inner(conn):
+            conn.execute("INSERT INTO users VALUES (2, 'inner')")
+            raise ValueError("inner failed")
+
+        @transactional
+        def outer(conn):
+            conn.execute("INSERT INTO users VALUES (1, 'outer')")
+            with self.assertRaises(ValueError):
+                inner(conn)
+            conn.execute("INSERT INTO users VALUES (3, 'after')")
+
+        outer(self.conn)
+        self.assertEqual(self.committed(), [1, 3])
+
+    def test_no_batch_commit_inside_savepoint(self):
+        """Test that a full batch waits for the open savepoint to be released"""
+        batches = []
+
+        @transactional
+        def inner(conn):
+            for user_id in (2, 3, 4):
+                conn.execute("INSERT INTO users VALUES (?, 'inner')", (user_id,))
+            batches.append((conn.batches_committed, self.committed()))
+
+        @transactional(batch_size=2)
+        def outer(conn):
+            conn.execute("INSERT INTO users VALUES (1, 'outer')")
+            inner(conn)
+            batches.append((conn.batches_committed, self.committed()))
+
+        outer(self.conn)
+        self.assertEqual(batches, [(0, []), (1, [1, 2, 3, 4])])
+
+    def test_rollback_to_resets_pending(self):
+        """Test that statements undone by ROLLBACK TO leave the batch count"""
+        pending = []
+
+        @transactional
+        def inner(conn):
+            conn.execute("INSERT INTO users VALUES (2, 'inner')")
+            conn.execute("INSERT INTO users VALUES (3, 'inner')")
+            raise ValueError("inner failed")
+
+        @transactional(batch_size=3)
+        def outer(conn):
+            conn.execute("INSERT INTO users VALUES (1, 'outer')")
+            with self.assertRaises(ValueError):
+                inner(conn)
+            pending.append((conn.pending, conn.batches_committed))
+
+        outer(self.conn)
+        self.assertEqual(pending, [(1, 0)])
+        self.assertEqual(self.committed(), [1])
+
+    def test_error_keeps_committed_batches(self):
+        """Test that a failure only rolls back the uncommitted batch"""
+        @transactional(batch_size=2)
+        def insert_users(conn):
+            cursor = conn.cursor()
+            for user_id in range(1, 6):
+                cursor.execute("INSERT INTO users VALUES (?, 'user')", (user_id,))
+            raise ValueError("failed after the second batch")
+
+        with self.assertRaises(ValueError):
+            insert_users(self.conn)
+        self.assertEqual(self.committed(), [1, 2, 3, 4])
+
+    def test_executemany_counts_once(self):
+        """Test that an executemany call counts as one statement"""
+        batcher = BatchingConnection(self.conn, batch_size=2)
+        self.conn.execute("BEGIN")
+        batcher.executemany("INSERT INTO users VALUES (?, 'user')", [(1,), (2,), (3,)])
+        self.assertEqual((batcher.pending, batcher.batches_committed), (1, 0))
+        self.conn.rollback()
+
+
+if __name__ == "__main__":
+    unittest.main()